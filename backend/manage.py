@@ -0,0 +1,123 @@
+"""Maintenance commands for the Smart Digital Campus backend.
+
+Run from the backend directory so server.py picks up the same .env:
+
+    python manage.py ensure-indexes
+    python manage.py backfill-placement    # also rebuilds analytics, which needs the placement
+    python manage.py rebuild-analytics
+    python manage.py drain-outbox
+    python manage.py migrate-timestamps
+    python manage.py dedupe-records
+    python manage.py migrate-attendance-sessions
+    python manage.py detect-defaulters
+    python manage.py backfill-notice-search
+"""
+import argparse
+import asyncio
+import sys
+
+import server
+
+
+async def ensure_indexes(args):
+    missing = await server.ensure_indexes()
+    print(f"Created missing indexes: {missing}" if missing else "All indexes present")
+
+
+async def backfill_placement(args):
+    for collection_name in ("attendance", "marks", "requests"):
+        updated = await server.backfill_student_placement(server.db[collection_name], batch_size=args.batch_size)
+        print(f"{collection_name}: stamped year/section/department on {updated} records")
+    # Section marks totals group by the placement just stamped, and startup only builds them once
+    await rebuild_analytics(args)
+
+
+async def rebuild_analytics(args):
+    result = await server.rebuild_analytics()
+    print(f"Rebuilt analytics counters {result['counters']} and {result['sections']} section totals")
+
+
+async def drain_outbox(args):
+    await server.email_outbox.start()
+    try:
+        while await server.email_outbox.drain_once():
+            pass
+        finalized = await server.email_outbox.finalize_legacy()
+        print(f"Dropped bodies from {finalized} older finished messages")
+        print(await server.email_outbox.stats())
+    finally:
+        await server.email_outbox.stop()
+
+
+async def migrate_timestamps(args):
+    for collection_name in server.TIMESTAMP_FIELDS:
+        result = await server.migrate_timestamps(collection_name, batch_size=args.batch_size)
+        print(f"{collection_name}: converted {result['converted']} documents, skipped {result['skipped']} unparseable values")
+        for key in result['conflicts']:
+            print(f"{collection_name}: left {key} as a string, its converted value duplicates an existing record")
+
+
+async def dedupe_records(args):
+    for collection_name in server.NATURAL_KEYS:
+        removed = await server.remove_duplicate_records(collection_name)
+        print(f"{collection_name}: removed {removed} duplicate records")
+    missing = await server.ensure_indexes()
+    print(f"Created missing indexes: {missing}" if missing else "All indexes present")
+
+
+async def migrate_attendance_sessions(args):
+    migrated = await server.migrate_attendance_to_sessions(batch_size=args.batch_size)
+    print(f"Folded {migrated} attendance records into sessions; set ATTENDANCE_STORAGE=sessions to serve from them")
+
+
+async def detect_defaulters(args):
+    result = await server.defaulters_job.run(full=args.full)
+    print(f"{result['mode']} run: re-tallied {result['pairs']} student/subject pairs, {result['defaulters']} below {server.ATTENDANCE_SHORTAGE_THRESHOLD}%")
+
+
+async def backfill_notice_search(args):
+    written = await server.backfill_notice_search(batch_size=args.batch_size)
+    print(f"Wrote {written} notice search entries")
+
+
+COMMANDS = {
+    "ensure-indexes": ensure_indexes,
+    "backfill-placement": backfill_placement,
+    "rebuild-analytics": rebuild_analytics,
+    "drain-outbox": drain_outbox,
+    "migrate-timestamps": migrate_timestamps,
+    "dedupe-records": dedupe_records,
+    "migrate-attendance-sessions": migrate_attendance_sessions,
+    "detect-defaulters": detect_defaulters,
+    "backfill-notice-search": backfill_notice_search,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Digital Campus maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("ensure-indexes", help="Create any missing indexes")
+    backfill = subparsers.add_parser("backfill-placement", help="Stamp student year/section/department onto attendance, marks and requests, then rebuild analytics")
+    backfill.add_argument("--batch-size", type=int, default=1000)
+    subparsers.add_parser("rebuild-analytics", help="Recompute the analytics store from source collections")
+    subparsers.add_parser("drain-outbox", help="Send every due email in the outbox and clean up older finished ones, then exit")
+    migrate = subparsers.add_parser("migrate-timestamps", help="Convert legacy ISO-string timestamps to native datetimes")
+    migrate.add_argument("--batch-size", type=int, default=1000)
+    subparsers.add_parser("dedupe-records", help="Keep the newest attendance/marks record per natural key, then build the unique indexes")
+    sessions = subparsers.add_parser("migrate-attendance-sessions", help="Fold per-student attendance records into session documents")
+    sessions.add_argument("--batch-size", type=int, default=1000)
+    defaulters = subparsers.add_parser("detect-defaulters", help="Refresh the attendance shortage snapshot")
+    defaulters.add_argument("--full", action="store_true", help="Re-tally all attendance instead of what changed since the last run")
+    notice_search = subparsers.add_parser("backfill-notice-search", help="Copy existing notices into the per-role search collection")
+    notice_search.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(COMMANDS[args.command](args))
+    finally:
+        server.client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,38 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query, Response, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request as HTTPRequest
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, DeleteOne, IndexModel, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo import monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 import uuid
 from datetime import datetime, timezone, timedelta
+from collections import OrderedDict
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+import base64
+import json
+import csv
+import io
+import hashlib
 import bcrypt
 import jwt
 import random
 import string 
-import requests
-import re
+import httpx
+import numpy as np
+import orjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -26,9 +43,145 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Metrics, served in Prometheus text format at /api/metrics
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def prometheus_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+class Histogram:
+    """Latency histogram; observed from the event loop as well as driver and bcrypt threads."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += seconds
+
+    def snapshot(self) -> tuple:
+        with self.lock:
+            return list(self.counts), self.sum
+
+class MetricsRegistry:
+    """Histograms, counters and gauges keyed by metric name and label values."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = (name, tuple(labels.items()))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(labels.items()))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_gauge(self, name: str, value: float, **labels):
+        key = (name, tuple(labels.items()))
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def render(self) -> str:
+        lines = []
+        for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+            typed = set()
+            for (name, labels), value in sorted(series.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} {kind}")
+                    typed.add(name)
+                lines.append(f"{name}{prometheus_labels(labels)} {value}")
+        typed = set()
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            counts, total = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{prometheus_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{prometheus_labels(labels)} {total}")
+            lines.append(f"{name}_count{prometheus_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command the driver sends, by collection and command name."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def started(self, event):
+        target = event.command.get("collection") if event.command_name == "getMore" else event.command.get(event.command_name)
+        self.collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event):
+        self.record(event)
+
+    def failed(self, event):
+        self.record(event)
+        metrics.inc("campus_mongo_command_failures_total", collection=self.collections.get((event.connection_id, event.request_id), ""), command=event.command_name)
+
+    def record(self, event):
+        collection = self.collections.pop((event.connection_id, event.request_id), "")
+        metrics.histogram("campus_mongo_command_duration_seconds", collection=collection, command=event.command_name).observe(event.duration_micros / 1e6)
+
+class MetricsMiddleware:
+    """Per-route latency, response status counts and in-flight requests, as plain ASGI middleware."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.add_gauge("campus_http_requests_in_flight", 1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.add_gauge("campus_http_requests_in_flight", -1)
+            # Label by route template, not raw path, so ids don't blow up the series count
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            metrics.histogram("campus_http_request_duration_seconds", method=scope["method"], route=route_path).observe(elapsed)
+            metrics.inc("campus_http_responses_total", method=scope["method"], route=route_path, status=str(status_code))
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Stored datetimes are UTC; read them back aware so responses keep their offset
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, tzinfo=timezone.utc, event_listeners=[MongoCommandMetrics()])
 db = client[os.environ['DB_NAME']]
 
 # Security
@@ -37,6 +190,190 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 10080  # 7 days
 VALID_FACULTY_IDS = ["66", "107", "102", "132", "222", "319", "192"]
 
+# Authenticated-user cache
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '2048'))
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+
+# Email outbox
+BREVO_API_URL = os.environ.get('BREVO_API_URL', 'https://api.brevo.com/v3/smtp/email')
+EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', '50'))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', '6'))
+EMAIL_RETRY_BASE_SECONDS = float(os.environ.get('EMAIL_RETRY_BASE_SECONDS', '2'))
+EMAIL_RETRY_MAX_SECONDS = float(os.environ.get('EMAIL_RETRY_MAX_SECONDS', '300'))
+EMAIL_SEND_TIMEOUT_SECONDS = float(os.environ.get('EMAIL_SEND_TIMEOUT_SECONDS', '10'))
+EMAIL_RETENTION_SECONDS = int(os.environ.get('EMAIL_RETENTION_SECONDS', str(7 * 24 * 3600)))
+EMAIL_LEASE_SECONDS = 60
+EMAIL_POLL_SECONDS = 5
+
+# One-time passwords: "mongo" shares them across workers, "memory" keeps them in this process
+OTP_STORE = os.environ.get('OTP_STORE', 'mongo')
+if OTP_STORE not in ("mongo", "memory"):
+    raise RuntimeError(f"OTP_STORE must be 'mongo' or 'memory', not {OTP_STORE!r}")
+OTP_TTL_SECONDS = int(os.environ.get('OTP_TTL_SECONDS', '600'))
+OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', '5'))
+OTP_VALIDITY_TEXT = f"{max(1, OTP_TTL_SECONDS // 60)} minutes"
+
+# Rate limits as requests per window, checked per client IP and per account before any
+# expensive work; "memory" buckets are per worker, "mongo" windows are shared by all workers
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+if RATE_LIMIT_STORE not in ("memory", "mongo"):
+    raise RuntimeError(f"RATE_LIMIT_STORE must be 'memory' or 'mongo', not {RATE_LIMIT_STORE!r}")
+# Per-IP limits are off unless set: behind a proxy (e.g. Render) every request comes from the
+# proxy's address, so they need CLIENT_IP_HEADER naming the header the proxy appends the
+# client address to, and CLIENT_IP_PROXY_HOPS counting the trusted proxies that append to it
+CLIENT_IP_HEADER = os.environ.get('CLIENT_IP_HEADER', '')
+CLIENT_IP_PROXY_HOPS = int(os.environ.get('CLIENT_IP_PROXY_HOPS', '1'))
+if CLIENT_IP_PROXY_HOPS < 1:
+    raise RuntimeError("CLIENT_IP_PROXY_HOPS must be at least 1")
+LOGIN_RATE_LIMIT_PER_IP = int(os.environ.get('LOGIN_RATE_LIMIT_PER_IP', '0'))
+LOGIN_RATE_LIMIT_PER_ACCOUNT = int(os.environ.get('LOGIN_RATE_LIMIT_PER_ACCOUNT', '10'))
+LOGIN_RATE_LIMIT_WINDOW_SECONDS = float(os.environ.get('LOGIN_RATE_LIMIT_WINDOW_SECONDS', '60'))
+SEND_OTP_RATE_LIMIT_PER_IP = int(os.environ.get('SEND_OTP_RATE_LIMIT_PER_IP', '0'))
+SEND_OTP_RATE_LIMIT_PER_EMAIL = int(os.environ.get('SEND_OTP_RATE_LIMIT_PER_EMAIL', '3'))
+SEND_OTP_RATE_LIMIT_WINDOW_SECONDS = float(os.environ.get('SEND_OTP_RATE_LIMIT_WINDOW_SECONDS', '600'))
+
+# Rendered notice feeds; other workers pick up new notices within the TTL
+NOTICE_FEED_TTL_SECONDS = float(os.environ.get('NOTICE_FEED_TTL_SECONDS', '15'))
+
+# Attendance storage: "records" keeps one document per student per class, "sessions" keeps one
+# document per (year, section, subject, date) with a roster reference and a packed presence bitmap
+ATTENDANCE_STORAGE = os.environ.get('ATTENDANCE_STORAGE', 'records')
+SESSION_WRITE_ATTEMPTS = 5
+if ATTENDANCE_STORAGE not in ("records", "sessions"):
+    raise RuntimeError(f"ATTENDANCE_STORAGE must be 'records' or 'sessions', not {ATTENDANCE_STORAGE!r}")
+
+# Marks statistics, computed over percentage of max_marks
+PASS_PERCENTAGE = float(os.environ.get('PASS_PERCENTAGE', '40'))
+MARKS_STATS_TTL_SECONDS = float(os.environ.get('MARKS_STATS_TTL_SECONDS', '600'))
+MARKS_STATS_PERCENTILES = (10, 25, 75, 90)
+MARKS_STATS_BATCH_SIZE = 10000
+
+# Attendance shortage detector
+ATTENDANCE_SHORTAGE_THRESHOLD = float(os.environ.get('ATTENDANCE_SHORTAGE_THRESHOLD', '75'))
+DEFAULTERS_INTERVAL_SECONDS = float(os.environ.get('DEFAULTERS_INTERVAL_SECONDS', '3600'))
+DEFAULTERS_CHUNK_SIZE = 100000
+
+# Attendance summaries; dropped on this worker's writes, other workers refresh within the TTL
+ATTENDANCE_SUMMARY_CACHE_SIZE = int(os.environ.get('ATTENDANCE_SUMMARY_CACHE_SIZE', '4096'))
+ATTENDANCE_SUMMARY_TTL_SECONDS = float(os.environ.get('ATTENDANCE_SUMMARY_TTL_SECONDS', '300'))
+
+# Password hashing runs in its own executor so bcrypt never blocks the event loop
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', '4'))
+PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS', '5'))
+
+# Roll numbers are unique regardless of case
+ROLL_NUMBER_COLLATION = {"locale": "en", "strength": 2}
+
+# Indexes backing every query the API runs, created idempotently on startup
+INDEX_SPECS = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("roll_number", ASCENDING)], name="roll_number_ci", collation=ROLL_NUMBER_COLLATION),
+        IndexModel([("role", ASCENDING), ("roll_number", ASCENDING), ("id", ASCENDING)], name="role_roll"),
+        IndexModel([("role", ASCENDING), ("year", ASCENDING), ("roll_number", ASCENDING), ("id", ASCENDING)], name="role_year_roll"),
+        IndexModel([("role", ASCENDING), ("year", ASCENDING), ("section", ASCENDING), ("roll_number", ASCENDING), ("id", ASCENDING)], name="role_year_section_roll"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_desc"),
+    ],
+    "attendance": [
+        IndexModel([("student_id", ASCENDING), ("subject", ASCENDING), ("date", ASCENDING)], name="natural_key_unique", unique=True),
+        IndexModel([("student_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="student_created"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_desc"),
+        IndexModel([("subject", ASCENDING), ("date", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="subject_date_created"),
+        IndexModel([("subject", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="subject_created"),
+        IndexModel([("date", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="date_created"),
+        IndexModel([("year", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="year_created"),
+        IndexModel([("year", ASCENDING), ("section", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="year_section_created"),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "marks": [
+        IndexModel([("student_id", ASCENDING), ("subject", ASCENDING), ("exam_type", ASCENDING)], name="natural_key_unique", unique=True),
+        IndexModel([("student_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="student_created"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_desc"),
+        IndexModel([("subject", ASCENDING), ("exam_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="subject_exam_created"),
+        IndexModel([("subject", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="subject_created"),
+        IndexModel([("exam_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="exam_created"),
+        IndexModel([("year", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="year_created"),
+        IndexModel([("year", ASCENDING), ("section", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="year_section_created"),
+    ],
+    "notices": [
+        IndexModel([("role_target", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="role_target_created"),
+    ],
+    # role_target is an array, and a text index can't take an array key as its equality prefix,
+    # so search runs over one copy of each notice per targeted role
+    "notice_search": [
+        IndexModel([("id", ASCENDING), ("role", ASCENDING)], name="id_role_unique", unique=True),
+        IndexModel([("role", ASCENDING), ("title", TEXT), ("content", TEXT)], name="role_title_content_text", weights={"title": 3, "content": 1}),
+    ],
+    "requests": [
+        IndexModel([("student_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="student_created"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_desc"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created"),
+        IndexModel([("status", ASCENDING), ("request_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_type_created"),
+        IndexModel([("request_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="type_created"),
+        IndexModel([("department", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="department_created"),
+        IndexModel([("department", ASCENDING), ("year", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="department_year_created"),
+        IndexModel([("department", ASCENDING), ("year", ASCENDING), ("section", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="department_year_section_created"),
+        IndexModel([("year", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="year_created"),
+        IndexModel([("year", ASCENDING), ("section", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="year_section_created"),
+    ],
+    "complaints": [
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_desc"),
+    ],
+    "otps": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("created_at", ASCENDING)], name="created_ttl", expireAfterSeconds=OTP_TTL_SECONDS),
+    ],
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+        IndexModel([("claim", ASCENDING)], name="claim"),
+        IndexModel([("finished_at", ASCENDING)], name="finished_ttl", expireAfterSeconds=EMAIL_RETENTION_SECONDS),
+    ],
+    "attendance_sessions": [
+        IndexModel([("year", ASCENDING), ("section", ASCENDING), ("subject", ASCENDING), ("date", ASCENDING)], name="session_key_unique", unique=True),
+        IndexModel([("roster_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="roster_created"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_desc"),
+        IndexModel([("subject", ASCENDING), ("date", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="subject_date_created"),
+        IndexModel([("year", ASCENDING), ("section", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="year_section_created"),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "attendance_rosters": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("student_ids", ASCENDING)], name="student_ids"),
+    ],
+    "attendance_defaulters": [
+        IndexModel([("student_id", ASCENDING), ("subject", ASCENDING)], name="student_subject_unique", unique=True),
+        IndexModel([("year", ASCENDING), ("section", ASCENDING), ("percentage", ASCENDING)], name="year_section_percentage"),
+    ],
+    "analytics": [
+        IndexModel([("kind", ASCENDING), ("year", ASCENDING), ("section", ASCENDING)], name="kind_year_section"),
+    ],
+}
+
+# List endpoints return at most this many rows per page
+PAGE_SIZE_DEFAULT = 1000
+PAGE_SIZE_MAX = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NOTICE_SEARCH_PAGE_SIZE = 20
+
+# Batch writes upsert on each record's natural key, in concurrent unordered chunks
+NATURAL_KEYS = {
+    "attendance": ("student_id", "subject", "date"),
+    "marks": ("student_id", "subject", "exam_type"),
+}
+BULK_WRITE_CHUNK_SIZE = 1000
+
+# Exports stream from the cursor in chunks of this many rows
+EXPORT_BATCH_SIZE = 1000
+
+# Keyset sort orders; the trailing id makes every key unique
+NEWEST_FIRST = [("created_at", DESCENDING), ("id", DESCENDING)]
+OLDEST_FIRST = [("created_at", ASCENDING), ("id", ASCENDING)]
+BY_ROLL_NUMBER = [("roll_number", ASCENDING), ("id", ASCENDING)]
+
 security = HTTPBearer()
 
 app = FastAPI()
@@ -106,6 +443,9 @@ class AttendanceRecord(BaseModel):
 
     marked_by: Optional[str] = None
     marked_by_name: Optional[str] = None
+    year: Optional[int] = None
+    section: Optional[str] = None
+    department: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class AttendanceCreate(BaseModel):
@@ -126,6 +466,9 @@ class MarksRecord(BaseModel):
     exam_type: str
     marked_by: Optional[str] = None
     marked_by_name: Optional[str] = None
+    year: Optional[int] = None
+    section: Optional[str] = None
+    department: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class MarksCreate(BaseModel):
@@ -165,6 +508,9 @@ class Request(BaseModel):
     approved_by: Optional[str] = None
     approved_by_name: Optional[str] = None
     admin_comment: Optional[str] = None
+    year: Optional[int] = None
+    section: Optional[str] = None
+    department: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class RequestCreate(BaseModel):
@@ -178,6 +524,24 @@ class RequestUpdate(BaseModel):
     status: Literal["approved", "rejected"]
     admin_comment: Optional[str] = None
 
+class RequestQueueCounts(BaseModel):
+    status: Dict[str, int]
+    request_type: Dict[str, int]
+
+class RequestQueue(BaseModel):
+    requests: List[Request]
+    counts: RequestQueueCounts
+
+class BulkRequestUpdate(BaseModel):
+    request_ids: List[str] = Field(..., min_length=1, max_length=BULK_WRITE_CHUNK_SIZE)
+    status: Literal["approved", "rejected"]
+    admin_comment: Optional[str] = None
+
+class BulkRequestUpdateResult(BaseModel):
+    requested: int
+    updated: int
+    skipped: int
+
 class UserUpdate(BaseModel):
     year: Optional[int] = None
     section: Optional[str] = None
@@ -208,6 +572,48 @@ class SectionMarks(BaseModel):
     section: str
     average_percentage: float
 
+class SubjectAttendance(BaseModel):
+    subject: str
+    present: int
+    total: int
+    percentage: float
+
+class AttendanceSummary(BaseModel):
+    student_id: str
+    student_name: Optional[str] = None
+    present: int
+    total: int
+    percentage: float
+    subjects: List[SubjectAttendance]
+
+class HistogramBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+class MarksStats(BaseModel):
+    count: int
+    mean: float
+    median: float
+    std_dev: float
+    min: float
+    max: float
+    percentiles: dict
+    pass_rate: float
+    histogram: List[HistogramBin]
+
+class AttendanceDefaulter(BaseModel):
+    student_id: str
+    student_name: Optional[str] = None
+    subject: str
+    year: Optional[int] = None
+    section: Optional[str] = None
+    department: Optional[str] = None
+    present: int
+    total: int
+    percentage: float
+    computed_at: datetime
+
 class AnalyticsSummary(BaseModel):
     total_students: int
     total_faculty: int
@@ -215,6 +621,67 @@ class AnalyticsSummary(BaseModel):
     total_notices: int
     section_marks: List[SectionMarks]
 
+# Caches
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def items(self) -> list:
+        now = time.monotonic()
+        return [(key, value) for key, (expires_at, value) in self._data.items() if expires_at >= now]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+notice_feed_cache = TTLCache(8, NOTICE_FEED_TTL_SECONDS)
+notice_feed_generation = 0
+attendance_summary_cache = TTLCache(ATTENDANCE_SUMMARY_CACHE_SIZE, ATTENDANCE_SUMMARY_TTL_SECONDS)
+section_attendance_cache = TTLCache(256, ATTENDANCE_SUMMARY_TTL_SECONDS)
+marks_stats_cache = TTLCache(1024, MARKS_STATS_TTL_SECONDS)
+
 # Helper functions
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -222,6 +689,34 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt")
+password_slots = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
+
+async def run_password_task(func, *args):
+    """Run a bcrypt helper in the password executor, queueing up to the configured timeout."""
+    try:
+        await asyncio.wait_for(password_slots.acquire(), timeout=PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Password hashing queue full, rejecting request")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        password_slots.release()
+        metrics.histogram("campus_password_hash_duration_seconds", operation=func.__name__).observe(time.perf_counter() - started)
+
+async def hash_password_async(password: str) -> str:
+    return await run_password_task(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_task(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -238,19 +733,22 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             logger.warning("Token validation failed: Missing 'sub' claim")
             raise HTTPException(status_code=401, detail="Invalid token")
         
+        cached_user = user_cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+        
         user_doc = await db.users.find_one({"id": user_id}, {"_id": 0})
         if user_doc is None:
             logger.warning(f"Token validation failed: User {user_id} not found in database")
             raise HTTPException(status_code=401, detail="User not found")
         
-        if isinstance(user_doc.get('created_at'), str):
-            user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
-        
         try:
-            return User(**user_doc)
+            user = User(**user_doc)
         except Exception as e:
             logger.error(f"User model validation failed for {user_id}: {e}")
             raise HTTPException(status_code=401, detail="User data invalid")
+        user_cache.set(user_id, user)
+        return user
     except jwt.ExpiredSignatureError as e:
         logger.warning(f"Token validation failed: Expired token - {str(e)}")
         raise HTTPException(status_code=401, detail="Token expired")
@@ -258,6 +756,677 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         logger.warning(f"Token validation failed: JWT Error - {str(e)}")
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def encode_cursor(values: list) -> str:
+    def encode_value(value):
+        if isinstance(value, datetime):
+            return {"$date": value.isoformat()}
+        return value
+    raw = json.dumps([encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("wrong cursor shape")
+        return [
+            datetime.fromisoformat(v["$date"]) if isinstance(v, dict) and "$date" in v else v
+            for v in values
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_query(sort: list, cursor: str) -> dict:
+    """Match documents strictly after the cursor position in the given sort order."""
+    values = decode_cursor(cursor, len(sort))
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        prefix = {sort[j][0]: values[j] for j in range(i)}
+        # Null and missing values sort before everything else, and comparisons with null
+        # match nothing, so a boundary on either side of the null bracket needs its own clause
+        if values[i] is None:
+            if direction == ASCENDING:
+                clauses.append({**prefix, field: {"$ne": None}})
+            continue
+        clauses.append({**prefix, field: {"$gt" if direction == ASCENDING else "$lt": values[i]}})
+        if direction == DESCENDING:
+            clauses.append({**prefix, field: None})
+        # BSON sorts every string before every date, so while legacy ISO-string timestamps
+        # remain, a page boundary must also take in the whole bracket of the other type
+        if field != "created_at":
+            continue
+        if direction == DESCENDING and isinstance(values[i], datetime):
+            clauses.append({**prefix, field: {"$type": "string"}})
+        elif direction == ASCENDING and isinstance(values[i], str):
+            clauses.append({**prefix, field: {"$type": "date"}})
+    return {"$or": clauses}
+
+def set_next_cursor(response: Response, docs: list, sort: list, limit: int) -> list:
+    """Trim the look-ahead row and advertise the cursor for the next page, if any."""
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([docs[-1].get(field) for field, _ in sort])
+    return docs
+
+def parse_attendance_date(value: str) -> datetime:
+    """Attendance dates arrive as YYYY-MM-DD and are stored as UTC midnight."""
+    try:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date, expected YYYY-MM-DD")
+    return parsed.replace(tzinfo=timezone.utc)
+
+def attendance_date_query(value: str) -> dict:
+    # Matches both the native date and the legacy string until the migration finishes
+    return {"$in": [value, parse_attendance_date(value)]}
+
+def model_projection(model) -> dict:
+    """Projection returning exactly the fields of a response model."""
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+# Render stored attendance dates back to YYYY-MM-DD in the database, whichever format they are in
+ATTENDANCE_DATE_STRING = {
+    "$cond": [
+        {"$eq": [{"$type": "$date"}, "date"]},
+        {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+        "$date"
+    ]
+}
+
+def attendance_projection() -> dict:
+    return {**model_projection(AttendanceRecord), "date": ATTENDANCE_DATE_STRING}
+
+def fast_json_response(docs: list, response: Response) -> Response:
+    """Encode trusted, model-projected documents straight to JSON, skipping response_model validation."""
+    headers = {}
+    if NEXT_CURSOR_HEADER in response.headers:
+        headers[NEXT_CURSOR_HEADER] = response.headers[NEXT_CURSOR_HEADER]
+    return Response(content=orjson.dumps(docs, option=orjson.OPT_NAIVE_UTC), media_type="application/json", headers=headers)
+
+async def find_page(collection, query: dict, projection: dict, sort: list, limit: int, after: Optional[str], response: Response) -> list:
+    if after:
+        query = {"$and": [query, keyset_query(sort, after)]} if query else keyset_query(sort, after)
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+    return set_next_cursor(response, docs, sort, limit)
+
+# Student year/section/department stamped onto attendance and marks at write time
+PLACEMENT_FIELDS = ("year", "section", "department")
+
+async def get_student_placements(student_ids: List[str]) -> dict:
+    """Map each student id to its year/section/department in one query."""
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in PLACEMENT_FIELDS}}
+    students = await db.users.find({"id": {"$in": list(set(student_ids))}}, projection).to_list(None)
+    return {student.pop("id"): student for student in students}
+
+def placement_query(match_query: dict, year: Optional[int], section: Optional[str]) -> dict:
+    # Section names repeat across years, and the placement indexes lead with year
+    if section and not year:
+        raise HTTPException(status_code=400, detail="section filter requires year")
+    if year:
+        match_query["year"] = year
+    if section:
+        match_query["section"] = section
+    return match_query
+
+async def backfill_student_placement(collection, batch_size: int = 1000) -> int:
+    """Stamp every student's current year/section/department onto their existing records."""
+    updated = 0
+    operations = []
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in PLACEMENT_FIELDS}}
+    async for student in db.users.find({"role": "student"}, projection):
+        placement = {field: student.get(field) for field in PLACEMENT_FIELDS}
+        operations.append(UpdateMany({"student_id": student["id"]}, {"$set": placement}))
+        if len(operations) >= batch_size:
+            result = await collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+    if operations:
+        result = await collection.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+    return updated
+
+# Timestamps stored as native datetimes; these collections may still hold legacy ISO strings
+TIMESTAMP_FIELDS = {
+    "users": ["created_at"],
+    "attendance": ["created_at", "date"],
+    "marks": ["created_at"],
+    "notices": ["created_at"],
+    "notice_search": ["created_at"],
+    "requests": ["created_at"],
+    "complaints": ["created_at"],
+}
+
+def parse_legacy_timestamp(value: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+async def migrate_timestamps(collection_name: str, batch_size: int = 1000) -> dict:
+    """Convert legacy ISO-string timestamps to native datetimes in place, one batch at a time."""
+    collection = db[collection_name]
+    fields = TIMESTAMP_FIELDS[collection_name]
+    converted = 0
+    skipped = 0
+    conflicts = []
+    last_id = None
+    while True:
+        query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+        if last_id is not None:
+            query = {"$and": [query, {"_id": {"$gt": last_id}}]}
+        docs = await collection.find(query, {field: 1 for field in fields}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+        operations = []
+        operation_ids = []
+        for doc in docs:
+            update = {}
+            for field in fields:
+                if isinstance(doc.get(field), str):
+                    parsed = parse_legacy_timestamp(doc[field])
+                    if parsed is None:
+                        skipped += 1
+                    else:
+                        update[field] = parsed
+            if update:
+                # Only replace values that are still the string we read, so concurrent writes win
+                operations.append(UpdateOne(
+                    {"_id": doc["_id"], **{field: doc[field] for field in update}},
+                    {"$set": update}
+                ))
+                operation_ids.append(doc["_id"])
+        if operations:
+            try:
+                result = await collection.bulk_write(operations, ordered=False)
+                converted += result.modified_count
+            except BulkWriteError as e:
+                # A legacy value whose converted form already exists under a unique index stays
+                # a string; report its key so the pair can be resolved by hand
+                converted += e.details.get("nModified", 0)
+                for error in e.details.get("writeErrors", []):
+                    if error.get("code") != 11000:
+                        raise
+                    conflicts.append(error.get("keyValue") or {"_id": operation_ids[error["index"]]})
+        last_id = docs[-1]["_id"]
+    return {"converted": converted, "skipped": skipped, "conflicts": conflicts}
+
+# Materialized analytics: one counters document plus running marks totals per (year, section)
+ANALYTICS_COUNTERS_ID = "counters"
+ROLE_COUNTERS = {"student": "students", "faculty": "faculty", "admin": "admins"}
+
+def marks_percentage(marks: float, max_marks: float) -> float:
+    return 0 if max_marks == 0 else marks / max_marks * 100
+
+async def bump_analytics_counters(increments: dict):
+    await db.analytics.update_one({"_id": ANALYTICS_COUNTERS_ID}, {"$inc": increments}, upsert=True)
+
+async def record_section_marks(docs: list, replaced: Optional[list] = None):
+    """Add marks records to the running per-section percentage totals, removing any they replaced."""
+    totals = {}
+    for sign, records in ((1, docs), (-1, replaced or [])):
+        for doc in records:
+            if doc.get('year') is None or doc.get('section') is None:
+                continue
+            key = (doc['year'], doc['section'])
+            percentage_sum, count = totals.get(key, (0.0, 0))
+            totals[key] = (percentage_sum + sign * marks_percentage(doc['marks'], doc['max_marks']), count + sign)
+    if not totals:
+        return
+    await db.analytics.bulk_write([
+        UpdateOne(
+            {"_id": f"section:{year}:{section}"},
+            {
+                "$set": {"kind": "section_marks", "year": year, "section": section},
+                "$inc": {"percentage_sum": percentage_sum, "count": count}
+            },
+            upsert=True
+        )
+        for (year, section), (percentage_sum, count) in totals.items()
+    ], ordered=False)
+
+async def rebuild_analytics() -> dict:
+    """Recompute the analytics store from the source collections to repair drift."""
+    counters = {field: await db.users.count_documents({"role": role}) for role, field in ROLE_COUNTERS.items()}
+    for request_status in ("pending", "approved", "rejected"):
+        counters[f"requests_{request_status}"] = await db.requests.count_documents({"status": request_status})
+    counters["notices"] = await db.notices.count_documents({})
+    await db.analytics.replace_one({"_id": ANALYTICS_COUNTERS_ID}, counters, upsert=True)
+
+    sections = await db.marks.aggregate([
+        {'$match': {'year': {'$ne': None}, 'section': {'$ne': None}}},
+        {
+            '$group': {
+                '_id': {'year': '$year', 'section': '$section'},
+                'percentage_sum': {'$sum': {
+                    '$cond': [
+                        {'$eq': ['$max_marks', 0]},
+                        0,
+                        {'$multiply': [{'$divide': ['$marks', '$max_marks']}, 100]}
+                    ]
+                }},
+                'count': {'$sum': 1}
+            }
+        }
+    ]).to_list(None)
+    section_ids = []
+    operations = []
+    for section in sections:
+        year, name = section['_id']['year'], section['_id']['section']
+        section_id = f"section:{year}:{name}"
+        section_ids.append(section_id)
+        operations.append(UpdateOne(
+            {"_id": section_id},
+            {"$set": {"kind": "section_marks", "year": year, "section": name, "percentage_sum": section['percentage_sum'], "count": section['count']}},
+            upsert=True
+        ))
+    if operations:
+        await db.analytics.bulk_write(operations, ordered=False)
+    await db.analytics.delete_many({"kind": "section_marks", "_id": {"$nin": section_ids}})
+    return {"counters": counters, "sections": len(section_ids)}
+
+def natural_key_upsert(doc: dict, key_fields: tuple) -> tuple:
+    """Split a record into its natural-key filter and an upsert that keeps the original id and created_at."""
+    key = {field: doc[field] for field in key_fields}
+    insert_only = {"id": doc["id"], "created_at": doc["created_at"]}
+    update = {field: value for field, value in doc.items() if field not in key and field not in insert_only}
+    for field, value in key.items():
+        if isinstance(value, datetime):
+            # Also match the legacy YYYY-MM-DD string and rewrite it as the native date, since
+            # an $in filter doesn't seed the inserted document the way an equality does
+            key[field] = {"$in": [value.strftime("%Y-%m-%d"), value]}
+            update[field] = value
+    update["updated_at"] = datetime.now(timezone.utc)
+    return key, {"$set": update, "$setOnInsert": insert_only}
+
+async def upsert_records(collection, key_fields: tuple, docs: list) -> list:
+    """Upsert records on their natural key; returns "inserted", "updated" or "failed" per row."""
+    async def write_chunk(chunk: list) -> list:
+        statuses = ["updated"] * len(chunk)
+        try:
+            result = await collection.bulk_write(
+                [UpdateOne(*natural_key_upsert(doc, key_fields), upsert=True) for doc in chunk],
+                ordered=False
+            )
+            upserted = result.upserted_ids
+        except BulkWriteError as e:
+            upserted = {item["index"]: item["_id"] for item in e.details.get("upserted", [])}
+            for error in e.details.get("writeErrors", []):
+                statuses[error["index"]] = "failed"
+        for index in upserted:
+            statuses[index] = "inserted"
+        return statuses
+
+    chunks = [docs[i:i + BULK_WRITE_CHUNK_SIZE] for i in range(0, len(docs), BULK_WRITE_CHUNK_SIZE)]
+    results = await asyncio.gather(*(write_chunk(chunk) for chunk in chunks))
+    return [row_status for chunk_statuses in results for row_status in chunk_statuses]
+
+def batch_write_summary(docs: list, statuses: list, noun: str) -> dict:
+    counts = {row_status: statuses.count(row_status) for row_status in ("inserted", "updated", "failed")}
+    return {
+        "message": f"{noun} saved for {counts['inserted'] + counts['updated']} students.",
+        **counts,
+        "results": [{"student_id": doc["student_id"], "status": row_status} for doc, row_status in zip(docs, statuses)]
+    }
+
+async def remove_duplicate_records(collection_name: str) -> int:
+    """Keep only the newest record per natural key so the unique index can be built."""
+    collection = db[collection_name]
+    key_fields = NATURAL_KEYS[collection_name]
+    duplicates = collection.aggregate([
+        {"$sort": {"created_at": -1}},
+        {"$group": {"_id": {field: f"${field}" for field in key_fields}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+    removed = 0
+    async for group in duplicates:
+        result = await collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    return removed
+
+def attendance_percentage(present: int, total: int) -> float:
+    return round(present / total * 100, 2) if total else 0.0
+
+async def summarize_attendance(match_query: dict) -> List[AttendanceSummary]:
+    """Present/total per student and subject for the matching attendance, in one aggregation."""
+    if ATTENDANCE_STORAGE == "sessions":
+        return await summarize_attendance_sessions(match_query)
+
+    rows = await db.attendance.aggregate([
+        {"$match": match_query},
+        {
+            "$group": {
+                "_id": {"student_id": "$student_id", "subject": "$subject"},
+                "student_name": {"$first": "$student_name"},
+                "present": {"$sum": {"$cond": [{"$eq": ["$status", "present"]}, 1, 0]}},
+                "total": {"$sum": 1}
+            }
+        },
+        {"$sort": {"_id.student_id": 1, "_id.subject": 1}},
+        {"$project": {"_id": 0, "student_id": "$_id.student_id", "subject": "$_id.subject", "student_name": 1, "present": 1, "total": 1}}
+    ]).to_list(None)
+    return build_attendance_summaries(rows)
+
+def build_attendance_summaries(rows: list) -> List[AttendanceSummary]:
+    """Fold per-(student, subject) present/total rows, sorted by student, into summaries."""
+    summaries = {}
+    for row in rows:
+        student_id = row["student_id"]
+        summary = summaries.setdefault(student_id, {
+            "student_id": student_id, "student_name": row.get("student_name"), "present": 0, "total": 0, "subjects": []
+        })
+        summary["present"] += row["present"]
+        summary["total"] += row["total"]
+        summary["subjects"].append(SubjectAttendance(
+            subject=row["subject"],
+            present=row["present"],
+            total=row["total"],
+            percentage=attendance_percentage(row["present"], row["total"])
+        ))
+    return [
+        AttendanceSummary(**summary, percentage=attendance_percentage(summary["present"], summary["total"]))
+        for summary in summaries.values()
+    ]
+
+def pack_presence(present: List[bool]) -> bytes:
+    bitmap = bytearray((len(present) + 7) // 8)
+    for index, is_present in enumerate(present):
+        if is_present:
+            bitmap[index >> 3] |= 1 << (index & 7)
+    return bytes(bitmap)
+
+def unpack_presence(bitmap: bytes, size: int) -> List[bool]:
+    return [bool(bitmap[index >> 3] & (1 << (index & 7))) for index in range(size)]
+
+def roster_id_for(student_ids: List[str], student_names: List[str]) -> str:
+    # Rosters are immutable and content-addressed, so identical rosters share one document
+    return hashlib.sha1("\n".join(f"{i}\t{n}" for i, n in zip(student_ids, student_names)).encode('utf-8')).hexdigest()
+
+async def load_rosters(roster_ids) -> dict:
+    rosters = await db.attendance_rosters.find({"id": {"$in": list(roster_ids)}}, {"_id": 0}).to_list(None)
+    return {roster["id"]: roster for roster in rosters}
+
+async def session_query(match_query: dict) -> dict:
+    """Translate an attendance record filter to the equivalent session filter."""
+    query = dict(match_query)
+    student_id = query.pop("student_id", None)
+    if student_id is not None:
+        rosters = await db.attendance_rosters.find({"student_ids": student_id}, {"_id": 0, "id": 1}).to_list(None)
+        query["roster_id"] = {"$in": [roster["id"] for roster in rosters]}
+    return query
+
+def session_records(session: dict, roster: dict, student_id: Optional[str] = None) -> list:
+    """Expand a session back into AttendanceRecord-shaped documents, optionally for one student."""
+    present = unpack_presence(session["present"], len(roster["student_ids"]))
+    date = session["date"].strftime("%Y-%m-%d") if isinstance(session["date"], datetime) else session["date"]
+    records = []
+    for index, (roster_student_id, student_name) in enumerate(zip(roster["student_ids"], roster["student_names"])):
+        if student_id is not None and roster_student_id != student_id:
+            continue
+        records.append({
+            "id": f"{session['id']}:{index}",
+            "student_id": roster_student_id,
+            "student_name": student_name,
+            "subject": session["subject"],
+            "date": date,
+            "status": "present" if present[index] else "absent",
+            "marked_by": session.get("marked_by"),
+            "marked_by_name": session.get("marked_by_name"),
+            "year": session.get("year"),
+            "section": session.get("section"),
+            "department": session.get("department"),
+            "created_at": session["created_at"]
+        })
+    return records
+
+def merge_session_records(student_ids: List[str], student_names: List[str], present: List[bool], records: list, session_id: str) -> tuple:
+    """Fold records into a session's roster and presence; returns the new roster, presence and (status, record id) per record."""
+    student_ids, student_names, present = list(student_ids), list(student_names), list(present)
+    positions = {sid: position for position, sid in enumerate(student_ids)}
+    results = []
+    for doc in records:
+        position = positions.get(doc["student_id"])
+        if position is None:
+            position = positions[doc["student_id"]] = len(student_ids)
+            student_ids.append(doc["student_id"])
+            student_names.append(doc["student_name"])
+            present.append(doc["status"] == "present")
+            results.append(("inserted", f"{session_id}:{position}"))
+        else:
+            student_names[position] = doc["student_name"]
+            present[position] = doc["status"] == "present"
+            results.append(("updated", f"{session_id}:{position}"))
+    return student_ids, student_names, present, results
+
+async def write_attendance_sessions(records: list) -> list:
+    """Merge attendance records into their sessions; returns (status, record id) per row.
+
+    Each session carries a version; a write only lands if the version it read is still
+    current, otherwise the read-merge-write is retried so concurrent marks aren't lost.
+    """
+    groups = {}
+    for index, doc in enumerate(records):
+        groups.setdefault((doc.get('year'), doc.get('section'), doc['subject'], doc['date']), []).append(index)
+
+    results = [None] * len(records)
+    for (year, section, subject, date), indexes in groups.items():
+        key = {"year": year, "section": section, "subject": subject, "date": date}
+        group = [records[index] for index in indexes]
+        first = group[0]
+        for _ in range(SESSION_WRITE_ATTEMPTS):
+            session = await db.attendance_sessions.find_one(key, {"_id": 0, "id": 1, "roster_id": 1, "present": 1, "version": 1})
+            student_ids, student_names, present = [], [], []
+            if session:
+                roster = (await load_rosters([session["roster_id"]]))[session["roster_id"]]
+                student_ids, student_names = roster["student_ids"], roster["student_names"]
+                present = unpack_presence(session["present"], len(student_ids))
+            session_id = session["id"] if session else str(uuid.uuid4())
+            student_ids, student_names, present, group_results = merge_session_records(
+                student_ids, student_names, present, group, session_id
+            )
+
+            roster_id = roster_id_for(student_ids, student_names)
+            await db.attendance_rosters.update_one(
+                {"id": roster_id},
+                {"$setOnInsert": {"student_ids": student_ids, "student_names": student_names}},
+                upsert=True
+            )
+            fields = {
+                "roster_id": roster_id,
+                "present": pack_presence(present),
+                "department": first.get("department"),
+                "marked_by": first.get("marked_by"),
+                "marked_by_name": first.get("marked_by_name"),
+                "updated_at": datetime.now(timezone.utc)
+            }
+            if session:
+                # Sessions written before versioning have no version field, which {"version": None} matches
+                written = await db.attendance_sessions.update_one(
+                    {**key, "version": session.get("version")},
+                    {"$set": fields, "$inc": {"version": 1}}
+                )
+                if written.matched_count:
+                    break
+            else:
+                try:
+                    await db.attendance_sessions.insert_one({
+                        **key, **fields, "id": session_id, "created_at": first["created_at"], "version": 1
+                    })
+                    break
+                except DuplicateKeyError:
+                    # Another writer created the session first; merge into theirs
+                    pass
+        else:
+            raise HTTPException(status_code=409, detail="Attendance was being marked concurrently, please retry")
+
+        for index, result in zip(indexes, group_results):
+            results[index] = result
+    return results
+
+async def find_session_record_page(query: dict, limit: int, after: Optional[str], response: Response, student_id: Optional[str] = None) -> list:
+    """Page through expanded session records.
+
+    Pages end on session boundaries, so a page never splits a session: it stops before the
+    session that would take it past limit rows, but always holds at least one whole session,
+    which may by itself exceed limit.
+    """
+    if after:
+        query = {"$and": [query, keyset_query(NEWEST_FIRST, after)]} if query else keyset_query(NEWEST_FIRST, after)
+    sessions = db.attendance_sessions.find(query, {"_id": 0}).sort(NEWEST_FIRST)
+    if student_id is not None:
+        # One row per session when reading a single student
+        sessions = sessions.limit(limit + 1)
+
+    records = []
+    rosters = {}
+    last_session = None
+    async for session in sessions:
+        if session["roster_id"] not in rosters:
+            rosters.update(await load_rosters([session["roster_id"]]))
+        expanded = session_records(session, rosters[session["roster_id"]], student_id)
+        if records and len(records) + len(expanded) > limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor([last_session[field] for field, _ in NEWEST_FIRST])
+            break
+        records.extend(expanded)
+        last_session = session
+    return records
+
+async def stream_session_records(query: dict):
+    rosters = {}
+    async for session in db.attendance_sessions.find(query, {"_id": 0}, batch_size=EXPORT_BATCH_SIZE).sort(OLDEST_FIRST):
+        if session["roster_id"] not in rosters:
+            rosters.update(await load_rosters([session["roster_id"]]))
+        for record in session_records(session, rosters[session["roster_id"]]):
+            yield record
+
+async def summarize_attendance_sessions(match_query: dict) -> List[AttendanceSummary]:
+    student_id = match_query.get("student_id")
+    sessions = await db.attendance_sessions.find(
+        await session_query(match_query),
+        {"_id": 0, "subject": 1, "roster_id": 1, "present": 1}
+    ).to_list(None)
+    rosters = await load_rosters({session["roster_id"] for session in sessions})
+
+    counts = {}
+    for session in sessions:
+        roster = rosters[session["roster_id"]]
+        present = unpack_presence(session["present"], len(roster["student_ids"]))
+        for index, (roster_student_id, student_name) in enumerate(zip(roster["student_ids"], roster["student_names"])):
+            if student_id is not None and roster_student_id != student_id:
+                continue
+            row = counts.setdefault((roster_student_id, session["subject"]), {
+                "student_id": roster_student_id, "subject": session["subject"], "student_name": student_name, "present": 0, "total": 0
+            })
+            row["present"] += present[index]
+            row["total"] += 1
+    return build_attendance_summaries([counts[key] for key in sorted(counts)])
+
+async def migrate_attendance_to_sessions(batch_size: int = 1000) -> int:
+    """Fold every per-student attendance record into session documents."""
+    migrated = 0
+    pending = []
+    async for doc in db.attendance.find({}, {"_id": 0}).sort("date", ASCENDING):
+        if isinstance(doc.get("date"), str):
+            doc["date"] = parse_attendance_date(doc["date"])
+        pending.append(doc)
+        if len(pending) >= batch_size:
+            await write_attendance_sessions(pending)
+            migrated += len(pending)
+            pending = []
+    if pending:
+        await write_attendance_sessions(pending)
+        migrated += len(pending)
+    return migrated
+
+def invalidate_attendance_summaries(student_ids: List[str]):
+    for student_id in student_ids:
+        attendance_summary_cache.pop(student_id)
+    section_attendance_cache.clear()
+
+def compute_marks_stats(marks: np.ndarray, max_marks: np.ndarray) -> MarksStats:
+    """Distribution of marks as a percentage of max_marks, vectorized over the whole assessment."""
+    if marks.size == 0:
+        return MarksStats(
+            count=0, mean=0.0, median=0.0, std_dev=0.0, min=0.0, max=0.0,
+            percentiles={str(p): 0.0 for p in MARKS_STATS_PERCENTILES}, pass_rate=0.0,
+            histogram=[HistogramBin(lower=lower, upper=lower + 10, count=0) for lower in range(0, 100, 10)]
+        )
+    percentage = np.divide(marks, max_marks, out=np.zeros_like(marks), where=max_marks != 0) * 100
+    counts, edges = np.histogram(np.clip(percentage, 0, 100), bins=10, range=(0, 100))
+    percentiles = np.percentile(percentage, MARKS_STATS_PERCENTILES)
+    return MarksStats(
+        count=int(percentage.size),
+        mean=round(float(percentage.mean()), 2),
+        median=round(float(np.median(percentage)), 2),
+        std_dev=round(float(percentage.std()), 2),
+        min=round(float(percentage.min()), 2),
+        max=round(float(percentage.max()), 2),
+        percentiles={str(p): round(float(v), 2) for p, v in zip(MARKS_STATS_PERCENTILES, percentiles)},
+        pass_rate=round(float((percentage >= PASS_PERCENTAGE).mean() * 100), 2),
+        histogram=[
+            HistogramBin(lower=float(edges[i]), upper=float(edges[i + 1]), count=int(counts[i]))
+            for i in range(len(counts))
+        ]
+    )
+
+async def read_marks_arrays(cursor, batch_size: int = MARKS_STATS_BATCH_SIZE) -> tuple:
+    """Copy marks and max_marks from a cursor into float arrays one batch at a time, so the
+    documents of only one batch are alive at once."""
+    values = np.empty((batch_size, 2), dtype=np.float64)
+    filled = 0
+    while True:
+        batch = await cursor.to_list(batch_size)
+        if not batch:
+            break
+        if filled + len(batch) > len(values):
+            values = np.resize(values, (max(2 * len(values), filled + len(batch)), 2))
+        rows = values[filled:filled + len(batch)]
+        rows[:, 0] = [doc["marks"] for doc in batch]
+        rows[:, 1] = [doc["max_marks"] for doc in batch]
+        filled += len(batch)
+    return values[:filled, 0], values[:filled, 1]
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    return value
+
+async def stream_export(cursor, fields: list, export_format: str):
+    """Yield a Motor cursor (or any async iterable of documents) as CSV or NDJSON, one chunk per EXPORT_BATCH_SIZE rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    if writer:
+        writer.writerow(fields)
+    rows = 0
+    async for doc in cursor:
+        if writer:
+            writer.writerow([export_value(doc.get(field)) for field in fields])
+        else:
+            buffer.write(json.dumps({field: export_value(doc.get(field)) for field in fields}))
+            buffer.write("\n")
+        rows += 1
+        if rows % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def streaming_export(rows, model, export_format: str, filename: str) -> StreamingResponse:
+    fields = [field for field in model.model_fields if field != 'model_config']
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_export(rows, fields, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+def export_response(collection, match_query: dict, year: Optional[int], section: Optional[str], model, projection: dict, export_format: str, filename: str) -> StreamingResponse:
+    query = placement_query(match_query, year, section)
+    cursor = collection.find(query, projection, batch_size=EXPORT_BATCH_SIZE).sort(OLDEST_FIRST)
+    return streaming_export(cursor, model, export_format, filename)
+
 def get_email_html(heading: str, message: str, otp: Optional[str] = None) -> str:
     otp_block = ""
     if otp:
@@ -292,7 +1461,7 @@ def get_email_html(heading: str, message: str, otp: Optional[str] = None) -> str
                 <h2>{heading}</h2>
                 <p>{message}</p>
                 {otp_block}
-                <p style="font-size: 14px; color: #6b7280;">This code is valid for 10 minutes. Do not share this code with anyone.</p>
+                <p style="font-size: 14px; color: #6b7280;">This code is valid for {OTP_VALIDITY_TEXT}. Do not share this code with anyone.</p>
             </div>
             <div class="footer">
                 <p>&copy; {datetime.now().year} Smart Digital Campus. All rights reserved.</p>
@@ -303,42 +1472,559 @@ def get_email_html(heading: str, message: str, otp: Optional[str] = None) -> str
     </html>
     """
 
-def send_email_task(to_email: str, subject: str, body: str, html_body: Optional[str] = None):
-    """Background task to send email via Brevo API (HTTP)"""
-    print("🚀 Starting email sending task...")
-    
-    brevo_api_key = os.environ.get('BREVO_API_KEY')
-    sender_email = os.environ.get('BREVO_SENDER_EMAIL', 'noreply@smartcampus.com')
-    sender_name = os.environ.get('BREVO_SENDER_NAME', 'Smart Digital Campus')
+# Final messages drop their bodies and lease; the TTL index then removes them
+EMAIL_FINAL_UNSET = {"text": "", "html": "", "claim": "", "lease_expires_at": ""}
 
-    if not brevo_api_key:
-        print(f"⚠️ Brevo API Key missing. Email to {to_email} skipped.")
-        return
+class EmailOutbox:
+    """Persistent email queue in db.email_outbox, drained by an async worker.
 
-    url = "https://api.brevo.com/v3/smtp/email"
-    headers = {
-        "accept": "application/json",
-        "api-key": brevo_api_key,
-        "content-type": "application/json"
-    }
-    payload = {
-        "sender": {"name": sender_name, "email": sender_email},
-        "to": [{"email": to_email}],
-        "subject": subject,
-        "textContent": body
-    }
-    if html_body:
-        payload["htmlContent"] = html_body
+    Messages are claimed in batches with a lease, so a crashed worker's batch is
+    picked up again once the lease expires. Sends go through one pooled HTTP
+    client; failures are retried with exponential backoff up to
+    EMAIL_MAX_ATTEMPTS. Once a message is sent, failed or skipped its bodies
+    (which may hold OTPs) are dropped and it expires after EMAIL_RETENTION_SECONDS.
+    Point BREVO_API_URL at a local stub server to exercise the worker without Brevo.
+    """
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.task: Optional[asyncio.Task] = None
+        self.wake = asyncio.Event()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.send_seconds_total = 0.0
+        self.send_seconds_max = 0.0
+        self.sends = 0
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(EMAIL_SEND_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5)
+        )
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        if self.client:
+            await self.client.aclose()
+
+    async def enqueue(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None):
+        now = datetime.now(timezone.utc)
+        await db.email_outbox.insert_one({
+            "id": str(uuid.uuid4()),
+            "to": to_email,
+            "subject": subject,
+            "text": body,
+            "html": html_body,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now
+        })
+        self.wake.set()
+
+    async def run(self):
+        while True:
+            try:
+                drained = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+                drained = 0
+            if drained:
+                continue
+            self.wake.clear()
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=EMAIL_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def claim_batch(self) -> list:
+        now = datetime.now(timezone.utc)
+        due = {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "lease_expires_at": {"$lte": now}}
+        ]}
+        candidates = await db.email_outbox.find(due, {"_id": 0, "id": 1}).limit(EMAIL_BATCH_SIZE).to_list(EMAIL_BATCH_SIZE)
+        if not candidates:
+            return []
+        claim = str(uuid.uuid4())
+        await db.email_outbox.update_many(
+            {"$and": [{"id": {"$in": [c["id"] for c in candidates]}}, due]},
+            {"$set": {"status": "sending", "claim": claim, "lease_expires_at": now + timedelta(seconds=EMAIL_LEASE_SECONDS)}}
+        )
+        return await db.email_outbox.find({"claim": claim}, {"_id": 0}).to_list(EMAIL_BATCH_SIZE)
+
+    async def drain_once(self) -> int:
+        messages = await self.claim_batch()
+        if not messages:
+            return 0
+
+        brevo_api_key = os.environ.get('BREVO_API_KEY')
+        if not brevo_api_key:
+            logger.warning(f"Brevo API Key missing. {len(messages)} emails skipped.")
+            await db.email_outbox.update_many(
+                {"id": {"$in": [m["id"] for m in messages]}},
+                {"$set": {"status": "skipped", "finished_at": datetime.now(timezone.utc)}, "$unset": EMAIL_FINAL_UNSET}
+            )
+            return len(messages)
+
+        outcomes = await self.deliver(messages, brevo_api_key)
+        now = datetime.now(timezone.utc)
+        operations = []
+        for message, (error, retryable) in zip(messages, outcomes):
+            if error is None:
+                self.sent += 1
+                operations.append(UpdateOne(
+                    {"id": message["id"]},
+                    {"$set": {"status": "sent", "sent_at": now, "finished_at": now}, "$unset": EMAIL_FINAL_UNSET}
+                ))
+                continue
+            attempts = message.get("attempts", 0) + 1
+            update = {"attempts": attempts, "last_error": error}
+            unset = {"claim": "", "lease_expires_at": ""}
+            if retryable and attempts < EMAIL_MAX_ATTEMPTS:
+                self.retried += 1
+                delay = min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS)
+                update.update({"status": "pending", "next_attempt_at": now + timedelta(seconds=delay * random.uniform(0.5, 1.0))})
+            else:
+                self.failed += 1
+                update.update({"status": "failed", "finished_at": now})
+                unset = EMAIL_FINAL_UNSET
+            operations.append(UpdateOne({"id": message["id"]}, {"$set": update, "$unset": unset}))
+        await db.email_outbox.bulk_write(operations, ordered=False)
+        failures = sum(1 for error, _ in outcomes if error is not None)
+        if failures:
+            logger.warning(f"Failed to send {failures} of {len(messages)} emails: {next(error for error, _ in outcomes if error)}")
+        return len(messages)
+
+    async def deliver(self, messages: list, brevo_api_key: str) -> list:
+        """Send a batch; returns (error, retryable) per message.
+
+        A non-retryable rejection of a multi-message batch may come from a single bad
+        address, so the messages are then sent one at a time to fail only that one.
+        """
+        error, retryable = await self.send_batch(messages, brevo_api_key)
+        if error is None or retryable or len(messages) == 1:
+            return [(error, retryable)] * len(messages)
+        return list(await asyncio.gather(*(self.send_batch([message], brevo_api_key) for message in messages)))
+
+    async def send_batch(self, messages: list, brevo_api_key: str) -> tuple:
+        """Send messages in one Brevo call using messageVersions; returns (error, retryable)."""
+        sender_email = os.environ.get('BREVO_SENDER_EMAIL', 'noreply@smartcampus.com')
+        sender_name = os.environ.get('BREVO_SENDER_NAME', 'Smart Digital Campus')
+        first = messages[0]
+        payload = {
+            "sender": {"name": sender_name, "email": sender_email},
+            "subject": first["subject"],
+            "textContent": first["text"]
+        }
+        if first.get("html"):
+            payload["htmlContent"] = first["html"]
+        if len(messages) == 1:
+            payload["to"] = [{"email": first["to"]}]
+        else:
+            payload["messageVersions"] = []
+            for message in messages:
+                version = {"to": [{"email": message["to"]}], "subject": message["subject"], "textContent": message["text"]}
+                if message.get("html"):
+                    version["htmlContent"] = message["html"]
+                payload["messageVersions"].append(version)
+
+        headers = {
+            "accept": "application/json",
+            "api-key": brevo_api_key,
+            "content-type": "application/json"
+        }
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(BREVO_API_URL, json=payload, headers=headers)
+        except httpx.HTTPError as e:
+            return f"{type(e).__name__}: {e}", True
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.histogram("campus_email_send_duration_seconds").observe(elapsed)
+            self.sends += 1
+            self.send_seconds_total += elapsed
+            self.send_seconds_max = max(self.send_seconds_max, elapsed)
 
-    try:
-        response = requests.post(url, json=payload, headers=headers)
         if response.status_code in [200, 201, 202]:
-            print(f"📧 Email sent to {to_email} via Brevo API")
+            return None, False
+        retryable = response.status_code == 429 or response.status_code >= 500
+        return f"HTTP {response.status_code}: {response.text[:200]}", retryable
+
+    async def finalize_legacy(self) -> int:
+        """Drop bodies and start the retention clock on final messages written before either existed."""
+        result = await db.email_outbox.update_many(
+            {"status": {"$in": ["sent", "failed", "skipped"]}, "finished_at": {"$exists": False}},
+            [{"$set": {"finished_at": {"$ifNull": ["$sent_at", "$created_at"]}}}, {"$unset": list(EMAIL_FINAL_UNSET)}]
+        )
+        return result.modified_count
+
+    async def stats(self) -> dict:
+        return {
+            "queue_depth": await db.email_outbox.count_documents({"status": {"$in": ["pending", "sending"]}}),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "sends": self.sends,
+            "send_latency_avg_ms": round(self.send_seconds_total / self.sends * 1000, 2) if self.sends else 0.0,
+            "send_latency_max_ms": round(self.send_seconds_max * 1000, 2)
+        }
+
+email_outbox = EmailOutbox()
+
+def session_columns(sessions: list, rosters: dict, roster_arrays: dict, student_filter) -> list:
+    """Expand attendance sessions against their rosters into defaulter tally columns.
+
+    roster_arrays caches each roster as NumPy arrays across calls.
+    """
+    columns = [[] for _ in range(7)]
+    for session in sessions:
+        if session["roster_id"] not in roster_arrays:
+            roster = rosters[session["roster_id"]]
+            roster_arrays[session["roster_id"]] = (np.array(roster["student_ids"], dtype=object), np.array(roster["student_names"], dtype=object))
+        student_ids, student_names = roster_arrays[session["roster_id"]]
+        size = len(student_ids)
+        present = np.unpackbits(np.frombuffer(session["present"], dtype=np.uint8), bitorder="little")[:size].astype(bool)
+        keep = np.isin(student_ids, student_filter) if student_filter is not None else slice(None)
+        for column, values in zip(columns, (
+            student_ids, np.full(size, session["subject"], dtype=object), present, student_names,
+            np.full(size, session.get("year"), dtype=object), np.full(size, session.get("section"), dtype=object),
+            np.full(size, session.get("department"), dtype=object)
+        )):
+            column.append(values[keep])
+    return [np.concatenate(column) for column in columns]
+
+def record_columns(docs: list) -> list:
+    """Defaulter tally columns for a chunk of per-student attendance records."""
+    return [
+        np.array([doc["student_id"] for doc in docs], dtype=object),
+        np.array([doc["subject"] for doc in docs], dtype=object),
+        np.array([doc["status"] == "present" for doc in docs], dtype=bool),
+        np.array([doc.get("student_name") for doc in docs], dtype=object),
+        np.array([doc.get("year") for doc in docs], dtype=object),
+        np.array([doc.get("section") for doc in docs], dtype=object),
+        np.array([doc.get("department") for doc in docs], dtype=object),
+    ]
+
+def tally_chunk(tallies: dict, chunk: list):
+    """Add one chunk of columns to the running present/total per (student_id, subject)."""
+    student_ids, subjects, present, names, years, sections, departments = chunk
+    keys = np.char.add(np.char.add(student_ids.astype(str), "\x1f"), subjects.astype(str))
+    unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    present_counts = np.bincount(inverse, weights=present, minlength=len(unique_keys))
+    totals = np.bincount(inverse, minlength=len(unique_keys))
+    for i, row in enumerate(first):
+        key = (student_ids[row], subjects[row])
+        tally = tallies.get(key)
+        if tally is None:
+            tallies[key] = {
+                "student_id": student_ids[row], "subject": subjects[row], "student_name": names[row],
+                "year": years[row], "section": sections[row], "department": departments[row],
+                "present": int(present_counts[i]), "total": int(totals[i])
+            }
         else:
-            print(f"❌ Failed to send email: {response.text}")
-    except Exception as e:
-        print(f"❌ Exception sending email: {e}")
-    print("✅ Email sending task finished.")
+            tally["present"] += int(present_counts[i])
+            tally["total"] += int(totals[i])
+
+class AttendanceDefaultersJob:
+    """Periodically snapshots (student, subject) pairs below ATTENDANCE_SHORTAGE_THRESHOLD.
+
+    The first run, and any run with full=True, tallies the whole attendance store.
+    Later runs only re-tally the (student, subject) pairs touched by attendance
+    written since the previous run. Tallies are computed chunk by chunk with NumPy
+    so memory stays bounded. A lease in db.job_state keeps multiple workers from
+    running it at once.
+    """
+
+    job_id = "attendance_defaulters"
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.owner = str(uuid.uuid4())
+
+    async def start(self):
+        self.task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def run_forever(self):
+        while True:
+            try:
+                if await self.acquire_lease():
+                    await self.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Attendance defaulters job failed: {e}")
+            await asyncio.sleep(DEFAULTERS_INTERVAL_SECONDS)
+
+    async def acquire_lease(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await db.job_state.find_one_and_update(
+                {"_id": self.job_id, "$or": [{"lease_until": {"$lt": now}}, {"lease_owner": self.owner}, {"lease_until": {"$exists": False}}]},
+                {"$set": {"lease_owner": self.owner, "lease_until": now + timedelta(seconds=DEFAULTERS_INTERVAL_SECONDS / 2)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def run(self, full: bool = False) -> dict:
+        started_at = datetime.now(timezone.utc)
+        state = await db.job_state.find_one({"_id": self.job_id}) or {}
+        last_run_at = None if full else state.get("last_run_at")
+
+        if last_run_at is None:
+            tallies = await self.tally({})
+            written = await self.write_snapshot(tallies, started_at, replace_all=True)
+        else:
+            affected = await self.affected_pairs(last_run_at)
+            if not affected:
+                await db.job_state.update_one({"_id": self.job_id}, {"$set": {"last_run_at": started_at}})
+                return {"mode": "incremental", "pairs": 0, "defaulters": 0}
+            queries = [{"subject": subject, "student_id": {"$in": student_ids}} for subject, student_ids in affected.items()]
+            tallies = {}
+            for query in queries:
+                tallies.update(await self.tally(query))
+            written = await self.write_snapshot(tallies, started_at, replace_all=False)
+
+        await db.job_state.update_one({"_id": self.job_id}, {"$set": {"last_run_at": started_at}}, upsert=True)
+        return {"mode": "full" if last_run_at is None else "incremental", "pairs": len(tallies), "defaulters": written}
+
+    async def affected_pairs(self, since: datetime) -> dict:
+        """Subjects mapped to the students whose attendance was written since the last run."""
+        affected = {}
+        if ATTENDANCE_STORAGE == "sessions":
+            sessions = await db.attendance_sessions.find(
+                {"updated_at": {"$gt": since}}, {"_id": 0, "subject": 1, "roster_id": 1}
+            ).to_list(None)
+            rosters = await load_rosters({session["roster_id"] for session in sessions})
+            for session in sessions:
+                affected.setdefault(session["subject"], set()).update(rosters[session["roster_id"]]["student_ids"])
+        else:
+            async for doc in db.attendance.find({"updated_at": {"$gt": since}}, {"_id": 0, "student_id": 1, "subject": 1}):
+                affected.setdefault(doc["subject"], set()).add(doc["student_id"])
+        return {subject: list(student_ids) for subject, student_ids in affected.items()}
+
+    async def attendance_chunks(self, query: dict):
+        """Yield column arrays (student_id, subject, present, student_name, year, section, department) chunk by chunk.
+
+        Building the arrays is NumPy and list work over up to DEFAULTERS_CHUNK_SIZE rows, so it
+        runs in a worker thread and the event loop keeps serving requests meanwhile.
+        """
+        if ATTENDANCE_STORAGE == "sessions":
+            sessions_query = await session_query(query)
+            # Rosters matched for some students also hold others whose tallies would be partial
+            student_filter = np.array(query["student_id"]["$in"], dtype=object) if "student_id" in query else None
+            rosters = {}
+            roster_arrays = {}
+            sessions = []
+            rows = 0
+            async for session in db.attendance_sessions.find(sessions_query, {"_id": 0}, batch_size=1000):
+                if session["roster_id"] not in rosters:
+                    rosters.update(await load_rosters([session["roster_id"]]))
+                sessions.append(session)
+                rows += len(rosters[session["roster_id"]]["student_ids"])
+                if rows >= DEFAULTERS_CHUNK_SIZE:
+                    yield await asyncio.to_thread(session_columns, sessions, rosters, roster_arrays, student_filter)
+                    sessions = []
+                    rows = 0
+            if sessions:
+                yield await asyncio.to_thread(session_columns, sessions, rosters, roster_arrays, student_filter)
+            return
+
+        projection = {"_id": 0, "student_id": 1, "subject": 1, "status": 1, "student_name": 1, "year": 1, "section": 1, "department": 1}
+        cursor = db.attendance.find(query, projection, batch_size=10000)
+        while True:
+            docs = await cursor.to_list(DEFAULTERS_CHUNK_SIZE)
+            if not docs:
+                break
+            yield await asyncio.to_thread(record_columns, docs)
+
+    async def tally(self, query: dict) -> dict:
+        """Present/total per (student_id, subject), tallied with one np.unique/bincount per chunk."""
+        tallies = {}
+        async for chunk in self.attendance_chunks(query):
+            await asyncio.to_thread(tally_chunk, tallies, chunk)
+        return tallies
+
+    async def write_snapshot(self, tallies: dict, computed_at: datetime, replace_all: bool) -> int:
+        operations = []
+        defaulters = 0
+        for (student_id, subject), tally in tallies.items():
+            key = {"student_id": student_id, "subject": subject}
+            percentage = attendance_percentage(tally["present"], tally["total"])
+            if percentage < ATTENDANCE_SHORTAGE_THRESHOLD:
+                defaulters += 1
+                operations.append(ReplaceOne(key, {**tally, "percentage": percentage, "computed_at": computed_at}, upsert=True))
+            elif not replace_all:
+                operations.append(DeleteOne(key))
+        for i in range(0, len(operations), BULK_WRITE_CHUNK_SIZE):
+            await db.attendance_defaulters.bulk_write(operations[i:i + BULK_WRITE_CHUNK_SIZE], ordered=False)
+        if replace_all:
+            await db.attendance_defaulters.delete_many({"computed_at": {"$lt": computed_at}})
+        return defaulters
+
+defaulters_job = AttendanceDefaultersJob()
+
+class RateLimiter:
+    """Allows `limit` requests per key per window.
+
+    The in-memory store is a token bucket per key, refilled continuously, so a check is a
+    dict lookup and some arithmetic. The Mongo store counts hits in fixed windows in
+    db.rate_limits, one upserted counter per key and window, expired by a TTL index.
+    """
+
+    def __init__(self, name: str, limit: int, window_seconds: float):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.rate = limit / window_seconds if limit > 0 else 0.0
+        self.allowed = 0
+        self.rejected = 0
+        self._buckets = {}
+        self._last_sweep = time.monotonic()
+
+    async def check(self, key: str):
+        if self.limit <= 0:
+            return
+        if RATE_LIMIT_STORE == "mongo":
+            retry_after = await self._take_shared(key)
+        else:
+            retry_after = self._take_local(key)
+        if retry_after:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+            )
+        self.allowed += 1
+
+    def _take_local(self, key: str) -> float:
+        now = time.monotonic()
+        if now - self._last_sweep > self.window_seconds:
+            # Buckets that have refilled completely carry no state worth keeping
+            self._buckets = {
+                bucket_key: (tokens, updated) for bucket_key, (tokens, updated) in self._buckets.items()
+                if tokens + (now - updated) * self.rate < self.limit
+            }
+            self._last_sweep = now
+        tokens, updated = self._buckets.get(key, (self.limit, now))
+        tokens = min(self.limit, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self._buckets[key] = (tokens - 1, now)
+        return 0.0
+
+    async def _take_shared(self, key: str) -> float:
+        now = time.time()
+        window = int(now // self.window_seconds)
+        window_end = (window + 1) * self.window_seconds
+        doc_id = f"{self.name}:{key}:{window}"
+        update = {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": datetime.fromtimestamp(window_end, timezone.utc)}}
+        try:
+            counter = await db.rate_limits.find_one_and_update(
+                {"_id": doc_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another worker inserted this window's counter first
+            counter = await db.rate_limits.find_one_and_update({"_id": doc_id}, update, return_document=ReturnDocument.AFTER)
+        return window_end - now if counter["count"] > self.limit else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "window_seconds": self.window_seconds,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "tracked_keys": len(self._buckets),
+        }
+
+def client_ip(http_request: HTTPRequest) -> str:
+    if CLIENT_IP_HEADER:
+        # Entries left of the ones our proxies appended are whatever the client sent, so skip them
+        forwarded = [entry.strip() for entry in http_request.headers.get(CLIENT_IP_HEADER, "").split(",") if entry.strip()]
+        if len(forwarded) >= CLIENT_IP_PROXY_HOPS:
+            return forwarded[-CLIENT_IP_PROXY_HOPS]
+    return http_request.client.host if http_request.client else "unknown"
+
+login_ip_limiter = RateLimiter("login_ip", LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_LIMIT_WINDOW_SECONDS)
+login_account_limiter = RateLimiter("login_account", LOGIN_RATE_LIMIT_PER_ACCOUNT, LOGIN_RATE_LIMIT_WINDOW_SECONDS)
+send_otp_ip_limiter = RateLimiter("send_otp_ip", SEND_OTP_RATE_LIMIT_PER_IP, SEND_OTP_RATE_LIMIT_WINDOW_SECONDS)
+send_otp_email_limiter = RateLimiter("send_otp_email", SEND_OTP_RATE_LIMIT_PER_EMAIL, SEND_OTP_RATE_LIMIT_WINDOW_SECONDS)
+RATE_LIMITERS = [login_ip_limiter, login_account_limiter, send_otp_ip_limiter, send_otp_email_limiter]
+
+class MongoOTPStore:
+    """OTPs in db.otps, one per email; a TTL index on created_at clears out unused ones."""
+
+    async def issue(self, email: str, otp: str):
+        await db.otps.update_one(
+            {"email": email},
+            {"$set": {"otp": otp, "created_at": datetime.now(timezone.utc), "attempts": 0}},
+            upsert=True
+        )
+
+    async def verify(self, email: str, otp: str) -> bool:
+        # The TTL monitor only sweeps once a minute, so expiry is also enforced here
+        matched = await db.otps.find_one_and_delete({
+            "email": email,
+            "otp": otp,
+            "created_at": {"$gt": datetime.now(timezone.utc) - timedelta(seconds=OTP_TTL_SECONDS)},
+            "attempts": {"$lt": OTP_MAX_ATTEMPTS}
+        }, projection={"_id": 1})
+        if matched is None:
+            await db.otps.update_one({"email": email}, {"$inc": {"attempts": 1}})
+            return False
+        return True
+
+class MemoryOTPStore:
+    """OTPs in a per-process dict; only suitable when a single worker serves registration."""
+
+    def __init__(self):
+        self._otps = {}
+        self._last_sweep = time.monotonic()
+
+    async def issue(self, email: str, otp: str):
+        now = time.monotonic()
+        if now - self._last_sweep > OTP_TTL_SECONDS:
+            self._otps = {key: entry for key, entry in self._otps.items() if entry[1] > now}
+            self._last_sweep = now
+        self._otps[email] = [otp, now + OTP_TTL_SECONDS, 0]
+
+    async def verify(self, email: str, otp: str) -> bool:
+        entry = self._otps.get(email)
+        if entry is None:
+            return False
+        expected, expires_at, attempts = entry
+        if expires_at <= time.monotonic() or attempts >= OTP_MAX_ATTEMPTS:
+            del self._otps[email]
+            return False
+        if expected != otp:
+            entry[2] += 1
+            return False
+        del self._otps[email]
+        return True
+
+OTP_STORES = {"mongo": MongoOTPStore, "memory": MemoryOTPStore}
+otp_store = OTP_STORES[OTP_STORE]()
 
 # Explicitly handle OPTIONS for send-otp to resolve 400 Bad Request issues
 @api_router.options("/auth/send-otp")
@@ -347,26 +2033,23 @@ async def options_send_otp():
 
 # OTP endpoints
 @api_router.post("/auth/send-otp")
-async def send_otp(request: OTPRequest, background_tasks: BackgroundTasks):
+async def send_otp(request: OTPRequest, http_request: HTTPRequest):
+    await send_otp_ip_limiter.check(client_ip(http_request))
+    await send_otp_email_limiter.check(request.email.lower())
     # if not request.email.endswith("@aits-tpt.edu.in"):
     #     raise HTTPException(status_code=400, detail="Email must be an @aits-tpt.edu.in address")
         
     otp = ''.join(random.choices(string.digits, k=6))
     
-    # Store OTP with expiration (e.g., 10 minutes)
-    await db.otps.update_one(
-        {"email": request.email},
-        {"$set": {"otp": otp, "created_at": datetime.now(timezone.utc)}},
-        upsert=True
-    )
+    await otp_store.issue(request.email, otp)
     
     # In a real application, send this via email. For now, we log it.
     print(f"🔐 OTP for {request.email}: {otp}")
     
     email_subject = "Smart Digital Campus - Verification Code"
-    email_body = f"Your verification code is: {otp}\n\nThis code expires in 10 minutes."
+    email_body = f"Your verification code is: {otp}\n\nThis code expires in {OTP_VALIDITY_TEXT}."
     email_html = get_email_html("Verification Code", "Please use the following verification code to complete your registration.", otp)
-    background_tasks.add_task(send_email_task, request.email, email_subject, email_body, html_body=email_html)
+    await email_outbox.enqueue(request.email, email_subject, email_body, html_body=email_html)
     
     return {"message": "OTP sent successfully"}
 
@@ -401,50 +2084,47 @@ async def register(user_data: UserCreate):
         if not user_data.mobile_number:
             raise HTTPException(status_code=400, detail="Mobile number is required")
 
-        existing_roll = await db.users.find_one({"roll_number": {"$regex": f"^{re.escape(user_data.roll_number)}$", "$options": "i"}})
+        existing_roll = await db.users.find_one({"roll_number": user_data.roll_number}, collation=ROLL_NUMBER_COLLATION)
         if existing_roll:
             raise HTTPException(status_code=400, detail="Roll number already registered")
         
         if not user_data.otp:
             raise HTTPException(status_code=400, detail="OTP is required for student registration")
             
-        otp_record = await db.otps.find_one({"email": user_data.email})
-        if not otp_record or otp_record.get("otp") != user_data.otp:
+        if not await otp_store.verify(user_data.email, user_data.otp):
             raise HTTPException(status_code=400, detail="Invalid or expired OTP")
-        
-        await db.otps.delete_one({"email": user_data.email})
 
     user_dict = user_data.model_dump()
     password = user_dict.pop("password")
     user_dict.pop("otp", None) # Remove OTP from user data before saving
-    password_hash = hash_password(password)
+    password_hash = await hash_password_async(password)
     
     user = User(**user_dict)
     doc = user.model_dump()
     doc['password_hash'] = password_hash
-    doc['created_at'] = doc['created_at'].isoformat()
-    
     await db.users.insert_one(doc)
+    await bump_analytics_counters({ROLE_COUNTERS[user.role]: 1})
+    user_cache.set(user.id, user)
     return user
 
 @api_router.post("/auth/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest):
+async def login(login_data: LoginRequest, http_request: HTTPRequest):
+    await login_ip_limiter.check(client_ip(http_request))
+    await login_account_limiter.check(login_data.email.lower())
+    
     # Try to find user by email first
     user_doc = await db.users.find_one({"email": login_data.email}, {"_id": 0})
     
     # If not found by email, try by roll number
     if not user_doc:
-        user_doc = await db.users.find_one({"roll_number": login_data.email}, {"_id": 0})
+        user_doc = await db.users.find_one({"roll_number": login_data.email}, {"_id": 0}, collation=ROLL_NUMBER_COLLATION)
 
     if not user_doc:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(login_data.password, user_doc.get('password_hash', '')):
+    if not await verify_password_async(login_data.password, user_doc.get('password_hash', '')):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if isinstance(user_doc.get('created_at'), str):
-        user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
-    
     user_doc.pop('password_hash', None)
     user = User(**user_doc)
     
@@ -465,19 +2145,18 @@ async def update_profile_image(
     update_data: ProfileImageUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    await db.users.update_one(
+    updated_user_doc = await db.users.find_one_and_update(
         {"id": current_user.id},
-        {"$set": {"profile_image_url": update_data.profile_image_url}}
+        {"$set": {"profile_image_url": update_data.profile_image_url}},
+        projection={"_id": 0, "password_hash": 0},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_user_doc = await db.users.find_one({"id": current_user.id}, {"_id": 0})
     if not updated_user_doc:
         raise HTTPException(status_code=404, detail="User not found after update")
 
-    if isinstance(updated_user_doc.get('created_at'), str):
-        updated_user_doc['created_at'] = datetime.fromisoformat(updated_user_doc['created_at'])
-    
-    return User(**updated_user_doc)
+    user = User(**updated_user_doc)
+    user_cache.set(user.id, user)
+    return user
 
 @api_router.put("/users/me", response_model=User)
 async def update_me(
@@ -489,63 +2168,81 @@ async def update_me(
     if not update_dict:
         return current_user
 
-    await db.users.update_one(
+    updated_user_doc = await db.users.find_one_and_update(
         {"id": current_user.id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        projection={"_id": 0, "password_hash": 0},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_user_doc = await db.users.find_one({"id": current_user.id}, {"_id": 0})
     if not updated_user_doc:
         raise HTTPException(status_code=404, detail="User not found after update")
 
-    if isinstance(updated_user_doc.get('created_at'), str):
-        updated_user_doc['created_at'] = datetime.fromisoformat(updated_user_doc['created_at'])
-    
-    return User(**updated_user_doc)
+    user = User(**updated_user_doc)
+    user_cache.set(user.id, user)
+    return user
 
 # Student endpoints
 @api_router.get("/students", response_model=List[User])
 async def get_students(
+    response: Response,
     year: Optional[int] = None, 
     section: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role not in ["faculty", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    query = {"role": "student"}
-    if year:
-        query["year"] = year
-    if section:
-        query["section"] = section
-
-    students = await db.users.find(query, {"_id": 0, "password_hash": 0}).sort("roll_number", 1).to_list(1000)
-    for student in students:
-        if isinstance(student.get('created_at'), str):
-            student['created_at'] = datetime.fromisoformat(student['created_at'])
-    return students
+    query = placement_query({"role": "student"}, year, section)
+    students = await find_page(db.users, query, model_projection(User), BY_ROLL_NUMBER, limit, after, response)
+    return fast_json_response(students, response)
 
 @api_router.get("/students/{student_id}/attendance", response_model=List[AttendanceRecord])
-async def get_student_attendance(student_id: str, current_user: User = Depends(get_current_user)):
+async def get_student_attendance(
+    student_id: str,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role == "student" and current_user.id != student_id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    records = await db.attendance.find({"student_id": student_id}, {"_id": 0}).to_list(1000)
-    for record in records:
-        if isinstance(record.get('created_at'), str):
-            record['created_at'] = datetime.fromisoformat(record['created_at'])
-    return records
+    if ATTENDANCE_STORAGE == "sessions":
+        query = await session_query({"student_id": student_id})
+        records = await find_session_record_page(query, limit, after, response, student_id=student_id)
+    else:
+        records = await find_page(db.attendance, {"student_id": student_id}, attendance_projection(), NEWEST_FIRST, limit, after, response)
+    return fast_json_response(records, response)
+
+@api_router.get("/students/{student_id}/attendance/summary", response_model=AttendanceSummary)
+async def get_student_attendance_summary(student_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role == "student" and current_user.id != student_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    summary = attendance_summary_cache.get(student_id)
+    if summary is None:
+        summaries = await summarize_attendance({"student_id": student_id})
+        summary = summaries[0] if summaries else AttendanceSummary(
+            student_id=student_id, present=0, total=0, percentage=0.0, subjects=[]
+        )
+        attendance_summary_cache.set(student_id, summary)
+    return summary
 
 @api_router.get("/students/{student_id}/marks", response_model=List[MarksRecord])
-async def get_student_marks(student_id: str, current_user: User = Depends(get_current_user)):
+async def get_student_marks(
+    student_id: str,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role == "student" and current_user.id != student_id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    records = await db.marks.find({"student_id": student_id}, {"_id": 0}).to_list(1000)
-    for record in records:
-        if isinstance(record.get('created_at'), str):
-            record['created_at'] = datetime.fromisoformat(record['created_at'])
-    return records
+    records = await find_page(db.marks, {"student_id": student_id}, model_projection(MarksRecord), NEWEST_FIRST, limit, after, response)
+    return fast_json_response(records, response)
 
 # Attendance endpoints
 @api_router.post("/attendance/batch", status_code=status.HTTP_201_CREATED)
@@ -553,7 +2250,9 @@ async def mark_batch_attendance(attendance_data: BatchAttendanceCreate, current_
     if current_user.role != "faculty":
         raise HTTPException(status_code=403, detail="Only faculty can mark attendance")
     
-    records_to_insert = []
+    placements = await get_student_placements([entry.student_id for entry in attendance_data.students_status])
+    attendance_date = parse_attendance_date(attendance_data.date)
+    records_to_write = []
     for student_status in attendance_data.students_status:
         record = AttendanceRecord(
             student_id=student_status.student_id,
@@ -562,24 +2261,36 @@ async def mark_batch_attendance(attendance_data: BatchAttendanceCreate, current_
             date=attendance_data.date,
             status=student_status.status,
             marked_by=current_user.id,
-            marked_by_name=current_user.name
+            marked_by_name=current_user.name,
+            **placements.get(student_status.student_id, {})
         )
         doc = record.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        records_to_insert.append(doc)
+        doc['date'] = attendance_date
+        records_to_write.append(doc)
         
-    if not records_to_insert:
+    if not records_to_write:
         raise HTTPException(status_code=400, detail="No attendance records provided")
         
-    await db.attendance.insert_many(records_to_insert)
-    return {"message": f"Attendance marked for {len(records_to_insert)} students."}
+    if ATTENDANCE_STORAGE == "sessions":
+        statuses = [row_status for row_status, _ in await write_attendance_sessions(records_to_write)]
+    else:
+        statuses = await upsert_records(db.attendance, NATURAL_KEYS["attendance"], records_to_write)
+    invalidate_attendance_summaries([doc["student_id"] for doc in records_to_write])
+    return batch_write_summary(records_to_write, statuses, "Attendance")
 
 @api_router.post("/marks/batch", status_code=status.HTTP_201_CREATED)
 async def add_batch_marks(marks_data: BatchMarksCreate, current_user: User = Depends(get_current_user)):
     if current_user.role != "faculty":
         raise HTTPException(status_code=403, detail="Only faculty can add marks")
     
-    records_to_insert = []
+    student_ids = [entry.student_id for entry in marks_data.students_marks]
+    placements = await get_student_placements(student_ids)
+    existing = await db.marks.find(
+        {"student_id": {"$in": student_ids}, "subject": marks_data.subject, "exam_type": marks_data.exam_type},
+        {"_id": 0, "student_id": 1, "marks": 1, "max_marks": 1, "year": 1, "section": 1}
+    ).to_list(None)
+    existing_by_student = {doc["student_id"]: doc for doc in existing}
+    records_to_write = []
     for student_mark in marks_data.students_marks:
         record = MarksRecord(
             student_id=student_mark.student_id,
@@ -589,41 +2300,64 @@ async def add_batch_marks(marks_data: BatchMarksCreate, current_user: User = Dep
             max_marks=marks_data.max_marks,
             exam_type=marks_data.exam_type,
             marked_by=current_user.id,
-            marked_by_name=current_user.name
+            marked_by_name=current_user.name,
+            **placements.get(student_mark.student_id, {})
         )
         doc = record.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        records_to_insert.append(doc)
+        records_to_write.append(doc)
         
-    if not records_to_insert:
+    if not records_to_write:
         raise HTTPException(status_code=400, detail="No marks records provided")
         
-    await db.marks.insert_many(records_to_insert)
-    return {"message": f"Marks added for {len(records_to_insert)} students."}
+    statuses = await upsert_records(db.marks, NATURAL_KEYS["marks"], records_to_write)
+    marks_stats_cache.clear()
+    await record_section_marks(
+        [doc for doc, row_status in zip(records_to_write, statuses) if row_status != "failed"],
+        [existing_by_student[doc["student_id"]] for doc, row_status in zip(records_to_write, statuses)
+         if row_status == "updated" and doc["student_id"] in existing_by_student]
+    )
+    return batch_write_summary(records_to_write, statuses, "Marks")
 
 @api_router.post("/attendance", response_model=AttendanceRecord)
 async def mark_attendance(attendance_data: AttendanceCreate, current_user: User = Depends(get_current_user)):
     if current_user.role != "faculty":
         raise HTTPException(status_code=403, detail="Only faculty can mark attendance")
     
+    placements = await get_student_placements([attendance_data.student_id])
     record = AttendanceRecord(
         **attendance_data.model_dump(),
         marked_by=current_user.id,
-        marked_by_name=current_user.name
+        marked_by_name=current_user.name,
+        **placements.get(attendance_data.student_id, {})
     )
     
     doc = record.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    
-    await db.attendance.insert_one(doc)
+    doc['date'] = parse_attendance_date(record.date)
+    if ATTENDANCE_STORAGE == "sessions":
+        [(_, record_id)] = await write_attendance_sessions([doc])
+        invalidate_attendance_summaries([record.student_id])
+        return record.model_copy(update={"id": record_id})
+
+    previous = await db.attendance.find_one_and_update(
+        *natural_key_upsert(doc, NATURAL_KEYS["attendance"]),
+        projection={"_id": 0, "id": 1, "created_at": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    invalidate_attendance_summaries([record.student_id])
+    if previous:
+        record = record.model_copy(update=previous)
     return record
 
 @api_router.get("/attendance", response_model=List[AttendanceRecord])
 async def get_all_attendance(
+    response: Response,
     date: Optional[str] = None,
     subject: Optional[str] = None,
     year: Optional[int] = None,
     section: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role not in ["faculty", "admin"]:
@@ -631,75 +2365,52 @@ async def get_all_attendance(
     
     match_query = {}
     if date:
-        match_query["date"] = date
+        match_query["date"] = attendance_date_query(date)
     if subject:
         match_query["subject"] = subject
 
-    if not year and not section:
-        records = await db.attendance.find(match_query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-        for record in records:
-            if isinstance(record.get('created_at'), str):
-                record['created_at'] = datetime.fromisoformat(record['created_at'])
-        return records
-
-    # Aggregation pipeline for filtering by year/section
-    pipeline = []
-    if match_query:
-        pipeline.append({"$match": match_query})
-    
-    pipeline.extend([
-        {
-            "$lookup": {
-                "from": "users",
-                "localField": "student_id",
-                "foreignField": "id",
-                "as": "student_info"
-            }
-        },
-        {"$unwind": "$student_info"}
-    ])
-
-    user_match_query = {}
-    if year:
-        user_match_query["student_info.year"] = year
-    if section:
-        user_match_query["student_info.section"] = section
-    
-    if user_match_query:
-        pipeline.append({"$match": user_match_query})
-
-    pipeline.append({"$project": {field: 1 for field in AttendanceRecord.model_fields if field != 'model_config'}})
-    pipeline.append({"$project": {"_id": 0}})
-
-    records = await db.attendance.aggregate(pipeline).to_list(length=1000)
-    for record in records:
-        if isinstance(record.get('created_at'), str):
-            record['created_at'] = datetime.fromisoformat(record['created_at'])
-    return records
+    query = placement_query(match_query, year, section)
+    if ATTENDANCE_STORAGE == "sessions":
+        records = await find_session_record_page(query, limit, after, response)
+    else:
+        records = await find_page(db.attendance, query, attendance_projection(), NEWEST_FIRST, limit, after, response)
+    return fast_json_response(records, response)
 
 @api_router.post("/marks", response_model=MarksRecord)
 async def add_marks(marks_data: MarksCreate, current_user: User = Depends(get_current_user)):
     if current_user.role != "faculty":
         raise HTTPException(status_code=403, detail="Only faculty can add marks")
     
+    placements = await get_student_placements([marks_data.student_id])
     record = MarksRecord(
         **marks_data.model_dump(),
         marked_by=current_user.id,
-        marked_by_name=current_user.name
+        marked_by_name=current_user.name,
+        **placements.get(marks_data.student_id, {})
     )
     
     doc = record.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    
-    await db.marks.insert_one(doc)
+    previous = await db.marks.find_one_and_update(
+        *natural_key_upsert(doc, NATURAL_KEYS["marks"]),
+        projection={"_id": 0, "id": 1, "created_at": 1, "marks": 1, "max_marks": 1, "year": 1, "section": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    await record_section_marks([doc], [previous] if previous else None)
+    marks_stats_cache.clear()
+    if previous:
+        record = record.model_copy(update={"id": previous["id"], "created_at": previous["created_at"]})
     return record
 
 @api_router.get("/marks", response_model=List[MarksRecord])
 async def get_all_marks(
+    response: Response,
     subject: Optional[str] = None,
     exam_type: Optional[str] = None,
     year: Optional[int] = None,
     section: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role not in ["faculty", "admin"]:
@@ -711,47 +2422,115 @@ async def get_all_marks(
     if exam_type:
         match_query["exam_type"] = exam_type
 
-    if not year and not section:
-        records = await db.marks.find(match_query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-        for record in records:
-            if isinstance(record.get('created_at'), str):
-                record['created_at'] = datetime.fromisoformat(record['created_at'])
-        return records
+    query = placement_query(match_query, year, section)
+    records = await find_page(db.marks, query, model_projection(MarksRecord), NEWEST_FIRST, limit, after, response)
+    return fast_json_response(records, response)
 
-    # Aggregation pipeline for filtering by year/section
-    pipeline = []
-    if match_query:
-        pipeline.append({"$match": match_query})
+@api_router.get("/attendance/summary", response_model=List[AttendanceSummary])
+async def get_section_attendance_summary(
+    year: int,
+    section: str,
+    subject: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["faculty", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
     
-    pipeline.extend([
-        {
-            "$lookup": {
-                "from": "users",
-                "localField": "student_id",
-                "foreignField": "id",
-                "as": "student_info"
-            }
-        },
-        {"$unwind": "$student_info"}
-    ])
-
-    user_match_query = {}
-    if year:
-        user_match_query["student_info.year"] = year
-    if section:
-        user_match_query["student_info.section"] = section
+    cache_key = (year, section, subject)
+    summaries = section_attendance_cache.get(cache_key)
+    if summaries is None:
+        match_query = {"year": year, "section": section}
+        if subject:
+            match_query["subject"] = subject
+        summaries = await summarize_attendance(match_query)
+        section_attendance_cache.set(cache_key, summaries)
+    return summaries
+
+@api_router.get("/attendance/defaulters", response_model=List[AttendanceDefaulter])
+async def get_attendance_defaulters(
+    year: Optional[int] = None,
+    section: Optional[str] = None,
+    subject: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["faculty", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    query = placement_query({"subject": subject} if subject else {}, year, section)
+    defaulters = await db.attendance_defaulters.find(
+        query, model_projection(AttendanceDefaulter)
+    ).sort([("year", 1), ("section", 1), ("percentage", 1)]).to_list(None)
+    return defaulters
+
+@api_router.get("/attendance/export")
+async def export_attendance(
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    date: Optional[str] = None,
+    subject: Optional[str] = None,
+    year: Optional[int] = None,
+    section: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["faculty", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
     
-    if user_match_query:
-        pipeline.append({"$match": user_match_query})
+    match_query = {}
+    if date:
+        match_query["date"] = attendance_date_query(date)
+    if subject:
+        match_query["subject"] = subject
 
-    pipeline.append({"$project": {field: 1 for field in MarksRecord.model_fields if field != 'model_config'}})
-    pipeline.append({"$project": {"_id": 0}})
+    if ATTENDANCE_STORAGE == "sessions":
+        rows = stream_session_records(placement_query(match_query, year, section))
+        return streaming_export(rows, AttendanceRecord, export_format, "attendance")
+    return export_response(db.attendance, match_query, year, section, AttendanceRecord, attendance_projection(), export_format, "attendance")
 
-    records = await db.marks.aggregate(pipeline).to_list(length=1000)
-    for record in records:
-        if isinstance(record.get('created_at'), str):
-            record['created_at'] = datetime.fromisoformat(record['created_at'])
-    return records
+@api_router.get("/marks/stats", response_model=MarksStats)
+async def get_marks_stats(
+    subject: Optional[str] = None,
+    exam_type: Optional[str] = None,
+    year: Optional[int] = None,
+    section: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["faculty", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    cache_key = (subject, exam_type, year, section)
+    stats = marks_stats_cache.get(cache_key)
+    if stats is None:
+        match_query = {}
+        if subject:
+            match_query["subject"] = subject
+        if exam_type:
+            match_query["exam_type"] = exam_type
+        query = placement_query(match_query, year, section)
+
+        cursor = db.marks.find(query, {"_id": 0, "marks": 1, "max_marks": 1}, batch_size=MARKS_STATS_BATCH_SIZE)
+        marks, max_marks = await read_marks_arrays(cursor)
+        stats = compute_marks_stats(marks, max_marks)
+        marks_stats_cache.set(cache_key, stats)
+    return stats
+
+@api_router.get("/marks/export")
+async def export_marks(
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    subject: Optional[str] = None,
+    exam_type: Optional[str] = None,
+    year: Optional[int] = None,
+    section: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["faculty", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    match_query = {}
+    if subject:
+        match_query["subject"] = subject
+    if exam_type:
+        match_query["exam_type"] = exam_type
+
+    return export_response(db.marks, match_query, year, section, MarksRecord, model_projection(MarksRecord), export_format, "marks")
 
 # Notices endpoints
 @api_router.post("/notices", response_model=Notice)
@@ -766,22 +2545,101 @@ async def create_notice(notice_data: NoticeCreate, current_user: User = Depends(
     )
     
     doc = notice.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    
     await db.notices.insert_one(doc)
+    entries = notice_search_entries(doc)
+    if entries:
+        await db.notice_search.insert_many(entries)
+    await bump_analytics_counters({"notices": 1})
+    invalidate_notice_feeds()
     return notice
 
+def notice_search_entries(notice: dict) -> list:
+    """One copy of a notice per role it targets, searchable with role as the text index prefix."""
+    # insert_one stamps _id onto the dict it was given, and each copy needs its own
+    fields = {key: value for key, value in notice.items() if key != "_id"}
+    return [{**fields, "role": role} for role in dict.fromkeys(notice.get("role_target") or [])]
+
+async def backfill_notice_search(batch_size: int = 1000) -> int:
+    """Copy every notice into notice_search, refreshing copies that already exist."""
+    written = 0
+    operations = []
+    async for notice in db.notices.find({}, {"_id": 0}):
+        for entry in notice_search_entries(notice):
+            operations.append(ReplaceOne({"id": entry["id"], "role": entry["role"]}, entry, upsert=True))
+        if len(operations) >= batch_size:
+            await db.notice_search.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+    if operations:
+        await db.notice_search.bulk_write(operations, ordered=False)
+        written += len(operations)
+    return written
+
+def invalidate_notice_feeds():
+    global notice_feed_generation
+    notice_feed_generation += 1
+    notice_feed_cache.clear()
+
+async def render_notice_feed(role: str, limit: int, after: Optional[str]) -> tuple:
+    """Serialize one page of a role's notice feed to JSON bytes, stamped with a content hash."""
+    page_response = Response()
+    notices = await find_page(
+        db.notices,
+        {"role_target": role},
+        model_projection(Notice),
+        NEWEST_FIRST, limit, after, page_response
+    )
+    body = orjson.dumps(notices, option=orjson.OPT_NAIVE_UTC)
+    version = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+    return body, version, page_response.headers.get(NEXT_CURSOR_HEADER)
+
 @api_router.get("/notices", response_model=List[Notice])
-async def get_notices(current_user: User = Depends(get_current_user)):
-    notices = await db.notices.find(
-        {"role_target": {"$in": [current_user.role]}},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(1000)
-    
+async def get_notices(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    cacheable = after is None and limit == PAGE_SIZE_DEFAULT
+    feed = notice_feed_cache.get(current_user.role) if cacheable else None
+    if feed is None:
+        generation = notice_feed_generation
+        feed = await render_notice_feed(current_user.role, limit, after)
+        if cacheable and generation == notice_feed_generation:
+            notice_feed_cache.set(current_user.role, feed)
+
+    body, version, next_cursor = feed
+    headers = {"ETag": version}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if if_none_match == version:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@api_router.get("/notices/search", response_model=List[Notice])
+async def search_notices(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(NOTICE_SEARCH_PAGE_SIZE, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    # Relevance scores can't be range-queried, so the cursor carries the offset into the ranking
+    offset = decode_cursor(after, 1)[0] if after else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    notices = await db.notice_search.find(
+        {"role": current_user.role, "$text": {"$search": q}},
+        {**model_projection(Notice), "score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"}), ("created_at", DESCENDING), ("id", DESCENDING)]).skip(offset).limit(limit + 1).to_list(limit + 1)
+
+    if len(notices) > limit:
+        notices = notices[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([offset + limit])
     for notice in notices:
-        if isinstance(notice.get('created_at'), str):
-            notice['created_at'] = datetime.fromisoformat(notice['created_at'])
-    return notices
+        notice.pop("score", None)
+    return fast_json_response(notices, response)
 
 # Requests endpoints
 @api_router.post("/requests", response_model=Request)
@@ -796,27 +2654,103 @@ async def create_request(request_data: RequestCreate, current_user: User = Depen
     request = Request(
         **req_dict,
         student_id=current_user.id,
-        student_name=current_user.name
+        student_name=current_user.name,
+        year=current_user.year,
+        section=current_user.section,
+        department=current_user.department
     )
     
     doc = request.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    
     await db.requests.insert_one(doc)
+    await bump_analytics_counters({"requests_pending": 1})
     return request
 
-@api_router.get("/requests", response_model=List[Request])
-async def get_requests(current_user: User = Depends(get_current_user)):
+def request_scope_query(
+    current_user: User,
+    department: Optional[str],
+    year: Optional[int],
+    section: Optional[str],
+    created_from: Optional[str],
+    created_to: Optional[str]
+) -> dict:
+    """Filters shared by the request list and queue, apart from status and type."""
     if current_user.role == "student":
         query = {"student_id": current_user.id}
     else:
-        query = {}
+        query = placement_query({"department": department} if department else {}, year, section)
+    created_at = {}
+    if created_from:
+        created_at["$gte"] = parse_attendance_date(created_from)
+    if created_to:
+        created_at["$lt"] = parse_attendance_date(created_to) + timedelta(days=1)
+    if created_at:
+        query["created_at"] = created_at
+    return query
+
+@api_router.get("/requests", response_model=List[Request])
+async def get_requests(
+    response: Response,
+    status: Optional[Literal["pending", "approved", "rejected"]] = None,
+    request_type: Optional[Literal["od", "leave", "grievance", "certificate"]] = None,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+    section: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    query = request_scope_query(current_user, department, year, section, created_from, created_to)
+    if status:
+        query["status"] = status
+    if request_type:
+        query["request_type"] = request_type
     
-    requests = await db.requests.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for req in requests:
-        if isinstance(req.get('created_at'), str):
-            req['created_at'] = datetime.fromisoformat(req['created_at'])
-    return requests
+    requests = await find_page(db.requests, query, model_projection(Request), NEWEST_FIRST, limit, after, response)
+    return fast_json_response(requests, response)
+
+# Every status and type the queue counts, zero counts included
+REQUEST_STATUSES = ("pending", "approved", "rejected")
+REQUEST_TYPES = ("od", "leave", "grievance", "certificate")
+
+@api_router.get("/requests/queue", response_model=RequestQueue)
+async def get_request_queue(
+    response: Response,
+    status: Optional[Literal["pending", "approved", "rejected"]] = None,
+    request_type: Optional[Literal["od", "leave", "grievance", "certificate"]] = None,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+    section: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["faculty", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    # The page is an index-backed keyset read of just the selected slice. Each badge count
+    # applies every filter except its own, so the status badges still count the other
+    # statuses while one is selected (and likewise for types), and each is an index count
+    scope = request_scope_query(current_user, department, year, section, created_from, created_to)
+    status_match = {"status": status} if status else {}
+    type_match = {"request_type": request_type} if request_type else {}
+    requests, status_counts, type_counts = await asyncio.gather(
+        find_page(db.requests, {**scope, **status_match, **type_match}, model_projection(Request), NEWEST_FIRST, limit, after, response),
+        asyncio.gather(*(db.requests.count_documents({**scope, **type_match, "status": value}) for value in REQUEST_STATUSES)),
+        asyncio.gather(*(db.requests.count_documents({**scope, **status_match, "request_type": value}) for value in REQUEST_TYPES))
+    )
+    queue = {
+        "requests": requests,
+        "counts": {
+            "status": dict(zip(REQUEST_STATUSES, status_counts)),
+            "request_type": dict(zip(REQUEST_TYPES, type_counts))
+        }
+    }
+    headers = {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]} if NEXT_CURSOR_HEADER in response.headers else {}
+    return Response(content=orjson.dumps(queue, option=orjson.OPT_NAIVE_UTC), media_type="application/json", headers=headers)
 
 @api_router.put("/requests/{request_id}", response_model=Request)
 async def update_request(request_id: str, update_data: RequestUpdate, current_user: User = Depends(get_current_user)):
@@ -827,19 +2761,49 @@ async def update_request(request_id: str, update_data: RequestUpdate, current_us
     update_dict['approved_by'] = current_user.id
     update_dict['approved_by_name'] = current_user.name
     
-    result = await db.requests.update_one(
+    # The document as it was gives the old status for the analytics counters, and with the
+    # update applied on top it is the response, so both come from one round trip
+    previous = await db.requests.find_one_and_update(
         {"id": request_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
     )
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Request not found")
     
-    request_doc = await db.requests.find_one({"id": request_id}, {"_id": 0})
-    if isinstance(request_doc.get('created_at'), str):
-        request_doc['created_at'] = datetime.fromisoformat(request_doc['created_at'])
+    if previous.get('status') != update_data.status:
+        await bump_analytics_counters({f"requests_{previous.get('status')}": -1, f"requests_{update_data.status}": 1})
     
-    return Request(**request_doc)
+    return Request(**{**previous, **update_dict})
+
+@api_router.post("/requests/bulk-update", response_model=BulkRequestUpdateResult)
+async def bulk_update_requests(update_data: BulkRequestUpdate, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ["faculty", "admin"]:
+        raise HTTPException(status_code=403, detail="Only faculty and admin can update requests")
+    
+    request_ids = list(dict.fromkeys(update_data.request_ids))
+    update_dict = {
+        "status": update_data.status,
+        "admin_comment": update_data.admin_comment,
+        "approved_by": current_user.id,
+        "approved_by_name": current_user.name
+    }
+    # Only pending requests move, so every modified document is one pending -> status transition
+    result = await db.requests.bulk_write(
+        [UpdateOne({"id": request_id, "status": "pending"}, {"$set": update_dict}) for request_id in request_ids],
+        ordered=False
+    )
+    
+    if result.modified_count:
+        await bump_analytics_counters({"requests_pending": -result.modified_count, f"requests_{update_data.status}": result.modified_count})
+    
+    return BulkRequestUpdateResult(
+        requested=len(request_ids),
+        updated=result.modified_count,
+        skipped=len(request_ids) - result.modified_count
+    )
 
 # Complaint Endpoints
 @api_router.post("/complaints", response_model=Complaint)
@@ -853,21 +2817,21 @@ async def submit_complaint(complaint_data: ComplaintCreate, current_user: User =
     )
     
     doc = complaint.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    
     await db.complaints.insert_one(doc)
     return complaint
 
 @api_router.get("/complaints", response_model=List[Complaint])
-async def get_complaints(current_user: User = Depends(get_current_user)):
+async def get_complaints(
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role not in ["faculty", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized to view complaints")
     
-    complaints = await db.complaints.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for complaint in complaints:
-        if isinstance(complaint.get('created_at'), str):
-            complaint['created_at'] = datetime.fromisoformat(complaint['created_at'])
-    return complaints
+    complaints = await find_page(db.complaints, {}, model_projection(Complaint), NEWEST_FIRST, limit, after, response)
+    return fast_json_response(complaints, response)
 
 # Admin analytics
 @api_router.get("/admin/analytics", response_model=AnalyticsSummary)
@@ -875,79 +2839,85 @@ async def get_analytics(current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admin can access analytics")
     
-    total_students = await db.users.count_documents({"role": "student"})
-    total_faculty = await db.users.count_documents({"role": "faculty"})
-    pending_requests = await db.requests.count_documents({"status": "pending"})
-    total_notices = await db.notices.count_documents({})
-    
-    # Calculate average marks per section
-    marks_pipeline = [
-        {
-            '$lookup': {
-                'from': 'users',
-                'localField': 'student_id',
-                'foreignField': 'id',
-                'as': 'student_info'
-            }
-        },
-        {'$unwind': '$student_info'},
-        {
-            '$match': {
-                'student_info.role': 'student',
-                'student_info.section': {'$ne': None},
-                'student_info.year': {'$ne': None}
-            }
-        },
-        {
-            '$project': {
-                'section': '$student_info.section',
-                'year': '$student_info.year',
-                'percentage': {
-                    '$cond': [
-                        {'$eq': ['$max_marks', 0]}, 
-                        0, 
-                        {'$multiply': [{'$divide': ['$marks', '$max_marks']}, 100]}
-                    ]
-                }
-            }
-        },
-        {
-            '$group': {
-                '_id': {'year': '$year', 'section': '$section'},
-                'average_percentage': {'$avg': '$percentage'}
-            }
-        },
-        {'$sort': {'_id.year': 1, '_id.section': 1}},
-        {
-            '$project': {
-                '_id': 0,
-                'year': '$_id.year',
-                'section': '$_id.section',
-                'average_percentage': {'$round': ['$average_percentage', 2]}
-            }
-        }
+    counters = await db.analytics.find_one({"_id": ANALYTICS_COUNTERS_ID}) or {}
+    sections = await db.analytics.find(
+        {"kind": "section_marks", "count": {"$gt": 0}}
+    ).sort([("year", 1), ("section", 1)]).to_list(None)
+
+    section_marks = [
+        SectionMarks(
+            year=section['year'],
+            section=section['section'],
+            average_percentage=round(section['percentage_sum'] / section['count'], 2)
+        )
+        for section in sections
     ]
-    section_marks_cursor = db.marks.aggregate(marks_pipeline)
-    section_marks = await section_marks_cursor.to_list(length=None)
 
     return AnalyticsSummary(
-        total_students=total_students,
-        total_faculty=total_faculty,
-        pending_requests=pending_requests,
-        total_notices=total_notices,
+        total_students=counters.get("students", 0),
+        total_faculty=counters.get("faculty", 0),
+        pending_requests=counters.get("requests_pending", 0),
+        total_notices=counters.get("notices", 0),
         section_marks=section_marks
     )
 
+@api_router.get("/admin/email-outbox")
+async def get_email_outbox_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admin can access email outbox stats")
+    
+    return await email_outbox.stats()
+
+@api_router.get("/admin/rate-limits")
+async def get_rate_limit_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admin can access rate limit stats")
+    
+    return {"store": RATE_LIMIT_STORE, **{limiter.name: limiter.stats() for limiter in RATE_LIMITERS}}
+
+@api_router.get("/metrics")
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admin can access metrics")
+    
+    lines = ["# TYPE campus_rate_limit_requests_total counter"]
+    for limiter in RATE_LIMITERS:
+        lines.append(f'campus_rate_limit_requests_total{{limiter="{limiter.name}",outcome="allowed"}} {limiter.allowed}')
+        lines.append(f'campus_rate_limit_requests_total{{limiter="{limiter.name}",outcome="rejected"}} {limiter.rejected}')
+    lines.append("# TYPE campus_cache_lookups_total counter")
+    for cache_name, cache in (("user", user_cache), ("attendance_summary", attendance_summary_cache), ("section_attendance", section_attendance_cache), ("marks_stats", marks_stats_cache), ("notice_feed", notice_feed_cache)):
+        lines.append(f'campus_cache_lookups_total{{cache="{cache_name}",outcome="hit"}} {cache.hits}')
+        lines.append(f'campus_cache_lookups_total{{cache="{cache_name}",outcome="miss"}} {cache.misses}')
+    return Response(content=metrics.render() + "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admin can access cache stats")
+    
+    return {
+        "user_cache": user_cache.stats(),
+        "attendance_summary_cache": attendance_summary_cache.stats(),
+        "section_attendance_cache": section_attendance_cache.stats(),
+        "marks_stats_cache": marks_stats_cache.stats(),
+        "notice_feed_cache": {
+            **notice_feed_cache.stats(),
+            "versions": {role: feed[1].strip('"') for role, feed in notice_feed_cache.items()}
+        }
+    }
+
 @api_router.get("/users", response_model=List[User])
-async def get_all_users(current_user: User = Depends(get_current_user)):
+async def get_all_users(
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admin can access all users")
     
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
-    for user in users:
-        if isinstance(user.get('created_at'), str):
-            user['created_at'] = datetime.fromisoformat(user['created_at'])
-    return users
+    users = await find_page(db.users, {}, model_projection(User), NEWEST_FIRST, limit, after, response)
+    return fast_json_response(users, response)
 
 app.include_router(api_router)
 
@@ -957,8 +2927,49 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
+async def ensure_indexes() -> dict:
+    """Create every index in INDEX_SPECS, returning the ones that were missing."""
+    missing = {}
+    for collection_name, indexes in INDEX_SPECS.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        absent = [index.document["name"] for index in indexes if index.document["name"] not in existing]
+        if absent:
+            logger.warning(f"Missing indexes on {collection_name}: {', '.join(absent)}")
+            missing[collection_name] = absent
+        # One index per call: createIndexes is all-or-nothing, so a unique index that can't
+        # be built over duplicate data would otherwise block every other index here too
+        for index in indexes:
+            if index.document["name"] in existing:
+                continue
+            try:
+                await collection.create_indexes([index])
+            except Exception as e:
+                logger.error(f"Index {index.document['name']} creation failed on {collection_name}: {e}")
+    return missing
+
+@app.on_event("startup")
+async def create_db_indexes():
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.error(f"Index bootstrap failed: {e}")
+    try:
+        if await db.analytics.find_one({"_id": ANALYTICS_COUNTERS_ID}) is None:
+            await rebuild_analytics()
+    except Exception as e:
+        logger.error(f"Analytics bootstrap failed: {e}")
+    await email_outbox.start()
+    await defaulters_job.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await email_outbox.stop()
+    await defaulters_job.stop()
     client.close()
+    password_executor.shutdown(wait=False)
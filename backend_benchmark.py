@@ -0,0 +1,465 @@
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+# server.py reads these at import time; the benchmarks never talk to MongoDB
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'campus_benchmark')
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from typing import List
+
+import server
+
+def make_attendance_docs(count):
+    """Attendance documents shaped like the ones server.py stores"""
+    base = datetime(2025, 1, 6, 9, 0, tzinfo=timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "student_id": str(uuid.uuid4()),
+            "student_name": f"Student {i}",
+            "subject": f"Subject {i % 6}",
+            "date": (base + timedelta(days=i // 60)).date().isoformat(),
+            "status": "present" if i % 5 else "absent",
+            "marked_by": "faculty-1",
+            "marked_by_name": "Faculty One",
+            "year": 2,
+            "section": "A",
+            "department": "CSE",
+            "created_at": (base + timedelta(minutes=i)).isoformat()
+        }
+        for i in range(count)
+    ]
+
+def time_call(func, repeat):
+    """Best-of-N wall time of func() in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def bench_list_serialization(sizes=(1000, 10000), repeat=5):
+    """Validated response_model path vs the orjson fast path for list endpoints"""
+    adapter = TypeAdapter(List[server.AttendanceRecord])
+    results = {}
+    for size in sizes:
+        docs = make_attendance_docs(size)
+
+        def validated():
+            records = [dict(doc) for doc in docs]
+            for record in records:
+                if isinstance(record.get('created_at'), str):
+                    record['created_at'] = datetime.fromisoformat(record['created_at'])
+            return json.dumps(jsonable_encoder(adapter.validate_python(records))).encode('utf-8')
+
+        def fast():
+            return orjson.dumps(docs, option=orjson.OPT_NAIVE_UTC)
+
+        validated_seconds = time_call(validated, repeat)
+        fast_seconds = time_call(fast, repeat)
+        results[f"list_serialization_{size}"] = {
+            "validated_records_per_s": round(size / validated_seconds),
+            "fast_records_per_s": round(size / fast_seconds),
+            "speedup": round(validated_seconds / fast_seconds, 1)
+        }
+    return results
+
+def bench_timestamp_reads(size=10000, repeat=5):
+    """Read path and stored size for legacy ISO-string timestamps vs native datetimes.
+
+    Both paths decode the same BSON the driver would receive and serialize the result, so the
+    only difference is parsing strings in Python vs decoding datetimes in the driver.
+    """
+    import bson
+    from bson.codec_options import CodecOptions
+
+    codec_options = CodecOptions(tz_aware=True, tzinfo=timezone.utc)
+    legacy_docs = make_attendance_docs(size)
+    native_docs = []
+    for doc in legacy_docs:
+        native = dict(doc)
+        native['created_at'] = datetime.fromisoformat(doc['created_at'])
+        native['date'] = datetime.strptime(doc['date'], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        native_docs.append(native)
+    legacy_bson = b"".join(bson.encode(doc) for doc in legacy_docs)
+    native_bson = b"".join(bson.encode(doc) for doc in native_docs)
+
+    def legacy_read():
+        records = bson.decode_all(legacy_bson, codec_options)
+        for record in records:
+            if isinstance(record.get('created_at'), str):
+                record['created_at'] = datetime.fromisoformat(record['created_at'])
+        return orjson.dumps(records)
+
+    def native_read():
+        records = bson.decode_all(native_bson, codec_options)
+        return orjson.dumps(records)
+
+    legacy_seconds = time_call(legacy_read, repeat)
+    native_seconds = time_call(native_read, repeat)
+    return {
+        f"timestamp_reads_{size}": {
+            "legacy_records_per_s": round(size / legacy_seconds),
+            "native_records_per_s": round(size / native_seconds),
+            "speedup": round(legacy_seconds / native_seconds, 1),
+            "legacy_bson_bytes_per_doc": round(len(legacy_bson) / size, 1),
+            "native_bson_bytes_per_doc": round(len(native_bson) / size, 1)
+        }
+    }
+
+def bench_attendance_storage(sections=4, students=60, days=60, periods=6, probes=50):
+    """Storage size and per-student query latency: per-record documents vs session bitmaps.
+
+    Needs a reachable MongoDB at MONGO_URL; uses and drops two scratch collections.
+    """
+    import random
+    from pymongo import MongoClient
+
+    mongo = MongoClient(os.environ['MONGO_URL'])
+    scratch = mongo[os.environ['DB_NAME']]
+    records, sessions, rosters = scratch.bench_attendance, scratch.bench_attendance_sessions, scratch.bench_attendance_rosters
+    for collection in (records, sessions, rosters):
+        collection.drop()
+    rng = random.Random(7)
+    base = datetime(2025, 1, 6)
+
+    all_students = []
+    for section_index in range(sections):
+        section = chr(ord('A') + section_index)
+        student_ids = [str(uuid.uuid4()) for _ in range(students)]
+        student_names = [f"Student {section}{i}" for i in range(students)]
+        all_students.extend(student_ids)
+        roster_id = server.roster_id_for(student_ids, student_names)
+        rosters.insert_one({"id": roster_id, "student_ids": student_ids, "student_names": student_names})
+        record_batch, session_batch = [], []
+        for day in range(days):
+            for period in range(periods):
+                subject = f"Subject {period}"
+                date = base + timedelta(days=day)
+                present = [rng.random() < 0.85 for _ in range(students)]
+                session = {
+                    "id": str(uuid.uuid4()), "year": 2, "section": section, "department": "CSE",
+                    "subject": subject, "date": date, "roster_id": roster_id,
+                    "present": server.pack_presence(present),
+                    "marked_by": "faculty-1", "marked_by_name": "Faculty One", "created_at": date
+                }
+                session_batch.append(session)
+                for record in server.session_records(session, {"student_ids": student_ids, "student_names": student_names}):
+                    record["id"] = str(uuid.uuid4())
+                    record["date"] = date
+                    record_batch.append(record)
+        records.insert_many(record_batch)
+        sessions.insert_many(session_batch)
+
+    records.create_index([("student_id", 1), ("created_at", -1), ("id", -1)])
+    sessions.create_index([("roster_id", 1), ("created_at", -1), ("id", -1)])
+    rosters.create_index([("student_ids", 1)])
+
+    def size_of(collection):
+        stats = scratch.command("collStats", collection.name)
+        return stats["storageSize"] + stats["totalIndexSize"]
+
+    probe_students = rng.sample(all_students, probes)
+
+    def query_records():
+        for student_id in probe_students:
+            list(records.find({"student_id": student_id}, {"_id": 0}).sort([("created_at", -1), ("id", -1)]))
+
+    def query_sessions():
+        for student_id in probe_students:
+            roster_docs = list(rosters.find({"student_ids": student_id}, {"_id": 0}))
+            by_id = {roster["id"]: roster for roster in roster_docs}
+            for session in sessions.find({"roster_id": {"$in": list(by_id)}}, {"_id": 0}).sort([("created_at", -1), ("id", -1)]):
+                server.session_records(session, by_id[session["roster_id"]], student_id)
+
+    records_seconds = time_call(query_records, 3)
+    sessions_seconds = time_call(query_sessions, 3)
+    result = {
+        "attendance_storage": {
+            "record_documents": records.count_documents({}),
+            "session_documents": sessions.count_documents({}),
+            "records_bytes": size_of(records),
+            "sessions_bytes": size_of(sessions) + size_of(rosters),
+            "records_student_query_ms": round(records_seconds / probes * 1000, 3),
+            "sessions_student_query_ms": round(sessions_seconds / probes * 1000, 3)
+        }
+    }
+    for collection in (records, sessions, rosters):
+        collection.drop()
+    mongo.close()
+    return result
+
+def bench_notice_search(notices=50000, probes=20, repeat=3):
+    """Notice search latency: a text index over every notice filtered by role_target afterwards,
+    vs notice_search with the reader's role as the text index's equality prefix.
+
+    Needs a reachable MongoDB at MONGO_URL; uses and drops two scratch collections.
+    """
+    import random
+    from pymongo import MongoClient, TEXT
+
+    mongo = MongoClient(os.environ['MONGO_URL'])
+    scratch = mongo[os.environ['DB_NAME']]
+    flat, per_role = scratch.bench_notices, scratch.bench_notice_search
+    for collection in (flat, per_role):
+        collection.drop()
+    rng = random.Random(11)
+    topics = ['Exam schedule', 'Holiday', 'Workshop', 'Fee payment', 'Placement drive', 'Sports meet']
+    targets = [["student"], ["faculty"], ["student", "faculty"], ["admin"], ["faculty", "admin"]]
+    base = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    docs = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"{rng.choice(topics)} {i}",
+            "content": f"{rng.choice(topics)} details for notice {i}, posted for the whole campus.",
+            "posted_by": "faculty-1",
+            "posted_by_name": "Faculty One",
+            "role_target": rng.choice(targets),
+            "created_at": base + timedelta(minutes=i)
+        }
+        for i in range(notices)
+    ]
+    flat.insert_many([dict(doc) for doc in docs])
+    per_role.insert_many([entry for doc in docs for entry in server.notice_search_entries(doc)])
+    flat.create_index([("title", TEXT), ("content", TEXT)], weights={"title": 3, "content": 1})
+    per_role.create_index([("role", 1), ("title", TEXT), ("content", TEXT)], weights={"title": 3, "content": 1})
+
+    terms = [rng.choice(topics).split()[0].lower() for _ in range(probes)]
+    projection = {"_id": 0, "id": 1, "title": 1, "score": {"$meta": "textScore"}}
+    sort = [("score", {"$meta": "textScore"}), ("created_at", -1), ("id", -1)]
+
+    def search(collection, role_field):
+        def run():
+            for term in terms:
+                list(collection.find({role_field: "student", "$text": {"$search": term}}, projection)
+                     .sort(sort).limit(server.NOTICE_SEARCH_PAGE_SIZE + 1))
+        return run
+
+    flat_seconds = time_call(search(flat, "role_target"), repeat)
+    per_role_seconds = time_call(search(per_role, "role"), repeat)
+    result = {
+        "notice_search": {
+            "notices": notices,
+            "role_filtered_search_ms": round(flat_seconds / probes * 1000, 3),
+            "role_prefixed_search_ms": round(per_role_seconds / probes * 1000, 3),
+            "role_prefixed_searches_per_s": round(probes / per_role_seconds)
+        }
+    }
+    for collection in (flat, per_role):
+        collection.drop()
+    mongo.close()
+    return result
+
+def bench_jwt(count=5000, repeat=5):
+    """create_access_token at login, and the jwt.decode get_current_user runs on every request"""
+    token = server.create_access_token({"sub": str(uuid.uuid4()), "role": "student"})
+
+    def encode():
+        for _ in range(count):
+            server.create_access_token({"sub": "user-1", "role": "student"})
+
+    def decode():
+        for _ in range(count):
+            server.jwt.decode(token, server.SECRET_KEY, algorithms=[server.ALGORITHM], options={"leeway": 60})
+
+    return {
+        "jwt": {
+            "create_access_token_per_s": round(count / time_call(encode, repeat)),
+            "decode_per_s": round(count / time_call(decode, repeat))
+        }
+    }
+
+def bench_user_validation(count=10000, repeat=5):
+    """User(**user_doc) on a document as find_one returns it, password hash included"""
+    user_doc = {
+        "id": str(uuid.uuid4()), "email": "student@university.edu", "name": "Student One", "role": "student",
+        "background_image_url": None, "profile_image_url": None, "department": "Computer Science",
+        "year": 2, "section": "A", "roll_number": "CSE2A001", "employee_id": None, "mobile_number": "9999999999",
+        "created_at": datetime(2025, 1, 6, 9, 0), "password_hash": "$2b$12$" + "x" * 53
+    }
+
+    def validate():
+        for _ in range(count):
+            server.User(**user_doc)
+
+    return {"user_validation": {"users_per_s": round(count / time_call(validate, repeat))}}
+
+def bench_batch_records(students=60, batches=50, repeat=5):
+    """Per-row work in /attendance/batch and /marks/batch: model build, model_dump and the upsert it becomes"""
+    roster = [(str(uuid.uuid4()), f"Student {i}") for i in range(students)]
+    placement = {"year": 2, "section": "A", "department": "Computer Science"}
+    attendance_date = server.parse_attendance_date("2025-01-06")
+
+    def attendance():
+        for _ in range(batches):
+            for student_id, student_name in roster:
+                doc = server.AttendanceRecord(
+                    student_id=student_id, student_name=student_name, subject="Subject 1", date="2025-01-06",
+                    status="present", marked_by="faculty-1", marked_by_name="Faculty One", **placement
+                ).model_dump()
+                doc['date'] = attendance_date
+                server.natural_key_upsert(doc, server.NATURAL_KEYS["attendance"])
+
+    def marks():
+        for _ in range(batches):
+            for student_id, student_name in roster:
+                doc = server.MarksRecord(
+                    student_id=student_id, student_name=student_name, subject="Subject 1", marks=24.5,
+                    max_marks=30, exam_type="Mid 1", marked_by="faculty-1", marked_by_name="Faculty One", **placement
+                ).model_dump()
+                server.natural_key_upsert(doc, server.NATURAL_KEYS["marks"])
+
+    rows = students * batches
+    return {
+        "batch_records": {
+            "attendance_rows_per_s": round(rows / time_call(attendance, repeat)),
+            "marks_rows_per_s": round(rows / time_call(marks, repeat))
+        }
+    }
+
+def bench_fromisoformat(size=10000, repeat=5):
+    """Legacy ISO-string timestamp parsing, as in the read fallbacks and migrate_timestamps"""
+    values = [doc["created_at"] for doc in make_attendance_docs(size)]
+
+    def fromisoformat():
+        for value in values:
+            datetime.fromisoformat(value)
+
+    def parse_legacy():
+        for value in values:
+            server.parse_legacy_timestamp(value)
+
+    return {
+        "fromisoformat": {
+            "fromisoformat_per_s": round(size / time_call(fromisoformat, repeat)),
+            "parse_legacy_timestamp_per_s": round(size / time_call(parse_legacy, repeat))
+        }
+    }
+
+def bench_email_html(count=5000, repeat=5):
+    """get_email_html for the OTP email, rendered on every send-otp"""
+    def render():
+        for _ in range(count):
+            server.get_email_html("Verification Code", "Please use the following verification code to complete your registration.", "123456")
+
+    return {"email_html": {"renders_per_s": round(count / time_call(render, repeat))}}
+
+class ListCursor:
+    """Stands in for a Motor cursor over already-fetched documents, handing them out in batches; the tests use it too"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.position = 0
+
+    async def to_list(self, length):
+        batch = self.docs[self.position:self.position + length]
+        self.position += len(batch)
+        return batch
+
+def bench_marks_stats(size=300000, repeat=5):
+    """GET /marks/stats over one large assessment: building the marks arrays, then compute_marks_stats"""
+    import asyncio
+    import random
+    import numpy as np
+
+    rng = random.Random(3)
+    docs = [{"marks": float(rng.randint(0, 100)), "max_marks": 100.0} for _ in range(size)]
+
+    def whole_list():
+        # The previous path: every document in one list, then a generator pass per column
+        marks = np.fromiter((doc["marks"] for doc in docs), dtype=np.float64, count=len(docs))
+        max_marks = np.fromiter((doc["max_marks"] for doc in docs), dtype=np.float64, count=len(docs))
+        return server.compute_marks_stats(marks, max_marks)
+
+    def batched():
+        marks, max_marks = asyncio.run(server.read_marks_arrays(ListCursor(docs)))
+        return server.compute_marks_stats(marks, max_marks)
+
+    assert whole_list() == batched()
+    marks, max_marks = asyncio.run(server.read_marks_arrays(ListCursor(docs)))
+    return {
+        "marks_stats": {
+            "whole_list_rows_per_s": round(size / time_call(whole_list, repeat)),
+            "batched_rows_per_s": round(size / time_call(batched, repeat)),
+            "compute_rows_per_s": round(size / time_call(lambda: server.compute_marks_stats(marks, max_marks), repeat))
+        }
+    }
+
+BENCHMARKS = {
+    "list_serialization": bench_list_serialization,
+    "timestamp_reads": bench_timestamp_reads,
+    "attendance_storage": bench_attendance_storage,
+    "notice_search": bench_notice_search,
+    "jwt": bench_jwt,
+    "user_validation": bench_user_validation,
+    "batch_records": bench_batch_records,
+    "fromisoformat": bench_fromisoformat,
+    "email_html": bench_email_html,
+    "marks_stats": bench_marks_stats,
+}
+
+# Only run when named explicitly, since they need a live MongoDB
+REQUIRES_MONGO = {"attendance_storage", "notice_search"}
+
+def compare_results(results, baseline, tolerance):
+    """Print every throughput metric against the baseline; return the ones slower than tolerance allows"""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            previous = baseline.get(name, {}).get(metric)
+            if not metric.endswith("_per_s") or not previous:
+                continue
+            change = value / previous - 1
+            marker = "❌" if change < -tolerance else "✅"
+            print(f"{marker} {name}.{metric}: {previous} -> {value} ({change:+.1%})")
+            if change < -tolerance:
+                regressions.append(f"{name}.{metric}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Digital Campus micro-benchmarks")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run from {', '.join(BENCHMARKS)} (default: all that need no MongoDB)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--compare", default=None, help="Compare against results previously written with --output")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed fractional throughput drop against --compare")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = {}
+    for name in args.names or [name for name in BENCHMARKS if name not in REQUIRES_MONGO]:
+        print(f"🔍 Running {name}...")
+        results.update(BENCHMARKS[name]())
+
+    for name, metrics in results.items():
+        print(f"📊 {name}: {metrics}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"results": results, "timestamp": datetime.now().isoformat()}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        print(f"\nCompared with {args.compare}:")
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Slower than baseline beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
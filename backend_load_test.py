@@ -0,0 +1,486 @@
+import requests
+import os
+import sys
+import json
+import time
+import math
+import uuid
+import random
+import threading
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent / 'backend'
+LOAD_TEST_PASSWORD = "LoadTest123!"
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of latencies"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(latencies):
+    """Summarize latencies (seconds) as milliseconds"""
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0
+    }
+
+class LoginBurstBenchmark:
+    """Measures latency of an unrelated endpoint while a burst of logins runs.
+
+    The burst is spread over enough throwaway accounts that none of them gets more than
+    logins_per_account logins, so against a server with the default per-account login limit
+    the burst still measures password hashing rather than 429s from the limiter.
+    """
+
+    def __init__(self, base_url="http://localhost:8000", logins=200, concurrency=50, probe_seconds=5.0, logins_per_account=5):
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.logins = logins
+        self.concurrency = concurrency
+        self.probe_seconds = probe_seconds
+        self.logins_per_account = logins_per_account
+        self.session = requests.Session()
+        self.credentials = []
+        self.token = None
+
+    def setup_users(self):
+        """Register the throwaway faculty accounts and log the first one in for the probe"""
+        unique_id = datetime.now().strftime('%H%M%S%f')
+        for i in range(math.ceil(self.logins / self.logins_per_account)):
+            credentials = {
+                "email": f"loadtest_{unique_id}_{i}@university.edu",
+                "password": LOAD_TEST_PASSWORD
+            }
+            user_data = {
+                **credentials,
+                "name": f"Load Test Faculty {i}",
+                "role": "faculty",
+                "department": "Computer Science",
+                "employee_id": str(66 + i)
+            }
+            response = self.session.post(f"{self.api_url}/auth/register", json=user_data)
+            response.raise_for_status()
+            self.credentials.append(credentials)
+        response = self.session.post(f"{self.api_url}/auth/login", json=self.credentials[0])
+        response.raise_for_status()
+        self.token = response.json()["token"]
+
+    def probe(self, stop_event, latencies):
+        """Hit /auth/verify back to back, recording each latency"""
+        session = requests.Session()
+        headers = {'Authorization': f'Bearer {self.token}'}
+        while not stop_event.is_set():
+            started = time.perf_counter()
+            session.get(f"{self.api_url}/auth/verify", headers=headers)
+            latencies.append(time.perf_counter() - started)
+
+    def login_once(self, index):
+        started = time.perf_counter()
+        response = requests.post(f"{self.api_url}/auth/login", json=self.credentials[index % len(self.credentials)])
+        return response.status_code, time.perf_counter() - started
+
+    def measure_probe(self, during_burst):
+        latencies = []
+        login_results = []
+        stop_event = threading.Event()
+        prober = threading.Thread(target=self.probe, args=(stop_event, latencies))
+        prober.start()
+        if during_burst:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                login_results = list(pool.map(self.login_once, range(self.logins)))
+        else:
+            time.sleep(self.probe_seconds)
+        stop_event.set()
+        prober.join()
+        return latencies, login_results
+
+    def run(self):
+        print("🚀 Starting login burst benchmark...")
+        print(f"Testing against: {self.base_url}")
+        self.setup_users()
+
+        idle_latencies, _ = self.measure_probe(during_burst=False)
+        burst_latencies, login_results = self.measure_probe(during_burst=True)
+
+        status_counts = {}
+        for status_code, _ in login_results:
+            status_counts[str(status_code)] = status_counts.get(str(status_code), 0) + 1
+
+        results = {
+            "logins": self.logins,
+            "accounts": len(self.credentials),
+            "concurrency": self.concurrency,
+            "probe_idle": summarize(idle_latencies),
+            "probe_during_login_burst": summarize(burst_latencies),
+            "login": summarize([latency for _, latency in login_results]),
+            "login_status_counts": status_counts,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        print(f"\n📊 /auth/verify idle:        p50 {results['probe_idle']['p50_ms']}ms  p99 {results['probe_idle']['p99_ms']}ms")
+        print(f"📊 /auth/verify during burst: p50 {results['probe_during_login_burst']['p50_ms']}ms  p99 {results['probe_during_login_burst']['p99_ms']}ms")
+        print(f"📊 /auth/login:               p50 {results['login']['p50_ms']}ms  p99 {results['login']['p99_ms']}ms  statuses {status_counts}")
+        return results
+
+class LocalServer:
+    """Runs the backend under uvicorn against a local mongod for the duration of a load test"""
+
+    def __init__(self, port=8765, workers=1, mongo_url="mongodb://localhost:27017", db_name="campus_loadtest"):
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.port = port
+        self.workers = workers
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.process = None
+
+    def __enter__(self):
+        from pymongo import MongoClient
+
+        # Start every run from an empty database so list endpoints return the same
+        # amount of data each time and baselines stay comparable
+        mongo = MongoClient(self.mongo_url)
+        try:
+            mongo.drop_database(self.db_name)
+        finally:
+            mongo.close()
+
+        env = {
+            **os.environ,
+            "MONGO_URL": self.mongo_url,
+            "DB_NAME": self.db_name,
+            # The login storm hammers a handful of accounts from one IP on purpose
+            "LOGIN_RATE_LIMIT_PER_IP": "0",
+            "LOGIN_RATE_LIMIT_PER_ACCOUNT": "0",
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env
+        )
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {self.process.returncode}")
+            try:
+                requests.get(f"{self.base_url}/api/auth/verify", timeout=1)
+                return self
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError("uvicorn did not start within 30 seconds")
+
+    def __exit__(self, *exc_info):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+class LoadTestCampus:
+    """One throwaway section of students plus a faculty and an admin account.
+
+    Faculty and admin register through the API; students need an emailed OTP to
+    register, so they are inserted straight into MongoDB in the shape server.py writes.
+    """
+
+    def __init__(self, api_url, mongo_url, db_name, students=60):
+        self.api_url = api_url
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.student_count = students
+        self.section = None
+        self.students = []
+        self.faculty_token = None
+        self.admin_token = None
+
+    def register_and_login(self, role, employee_id, unique_id):
+        user_data = {
+            "email": f"loadtest_{role}_{unique_id}@university.edu",
+            "password": LOAD_TEST_PASSWORD,
+            "name": f"Load Test {role.title()}",
+            "role": role,
+            "department": "Computer Science",
+            "employee_id": employee_id
+        }
+        requests.post(f"{self.api_url}/auth/register", json=user_data).raise_for_status()
+        response = requests.post(f"{self.api_url}/auth/login", json={"email": user_data["email"], "password": LOAD_TEST_PASSWORD})
+        response.raise_for_status()
+        return response.json()["token"]
+
+    def seed(self):
+        import bcrypt
+        from pymongo import MongoClient
+
+        unique_id = datetime.now().strftime('%H%M%S%f')
+        self.faculty_token = self.register_and_login("faculty", "66", unique_id)
+        self.admin_token = self.register_and_login("admin", "9", unique_id)
+
+        self.section = f"L{unique_id[-5:]}"
+        password_hash = bcrypt.hashpw(LOAD_TEST_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        now = datetime.now(timezone.utc)
+        self.students = [
+            {
+                "id": str(uuid.uuid4()),
+                "email": f"loadtest_student_{unique_id}_{i}@university.edu",
+                "name": f"Load Test Student {i}",
+                "role": "student",
+                "background_image_url": None,
+                "profile_image_url": None,
+                "department": "Computer Science",
+                "year": 2,
+                "section": self.section,
+                "roll_number": f"LT{unique_id}{i:03d}",
+                "employee_id": None,
+                "mobile_number": "9999999999",
+                "created_at": now,
+                "password_hash": password_hash
+            }
+            for i in range(self.student_count)
+        ]
+        mongo = MongoClient(self.mongo_url)
+        try:
+            # Students go in through MongoDB, so it must be the database the server uses
+            if mongo[self.db_name].users.find_one({"email": f"loadtest_faculty_{unique_id}@university.edu"}) is None:
+                raise RuntimeError(
+                    f"The server under test does not use {self.mongo_url} / {self.db_name}; "
+                    "pass the --mongo-url and --db-name it runs with"
+                )
+            mongo[self.db_name].users.insert_many([dict(student) for student in self.students])
+        finally:
+            mongo.close()
+
+    def student_tokens(self, count):
+        """Log in the first `count` students concurrently and return (student, token) pairs"""
+        def login(student):
+            response = requests.post(f"{self.api_url}/auth/login", json={"email": student["email"], "password": LOAD_TEST_PASSWORD})
+            response.raise_for_status()
+            return student, response.json()["token"]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            return list(pool.map(login, self.students[:count]))
+
+def timed_request(session, method, url, endpoint, samples, **kwargs):
+    """Issue one request and record (endpoint, latency, status); status 0 means a connection error"""
+    started = time.perf_counter()
+    try:
+        status_code = session.request(method, url, timeout=60, **kwargs).status_code
+    except requests.RequestException:
+        status_code = 0
+    samples.append((endpoint, time.perf_counter() - started, status_code))
+
+class DashboardLoadTest:
+    """Replays the dashboards' access patterns with concurrent virtual users"""
+
+    def __init__(self, api_url, campus, users=20, iterations=10):
+        self.api_url = api_url
+        self.campus = campus
+        self.users = users
+        self.iterations = iterations
+        self.student_sessions = []
+
+    def run_users(self, task):
+        """Run task(user_index, iteration, samples) for every virtual user, returning samples and wall time"""
+        samples = []
+        def user_loop(user_index):
+            for iteration in range(self.iterations):
+                task(user_index, iteration, samples)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.users) as pool:
+            list(pool.map(user_loop, range(self.users)))
+        return samples, time.perf_counter() - started
+
+    def headers(self, token):
+        return {'Authorization': f'Bearer {token}'}
+
+    def scenario_batch_attendance(self):
+        """FacultyDashboard submitting attendance for the whole 60-student section"""
+        headers = self.headers(self.campus.faculty_token)
+        base_date = datetime(2025, 1, 6)
+        def task(user_index, iteration, samples):
+            rng = random.Random(user_index * 1000 + iteration)
+            payload = {
+                "subject": f"Load Subject {user_index % 6}",
+                "date": (base_date + timedelta(days=iteration * self.users + user_index)).strftime("%Y-%m-%d"),
+                "students_status": [
+                    {"student_id": student["id"], "student_name": student["name"], "status": "present" if rng.random() < 0.85 else "absent"}
+                    for student in self.campus.students
+                ]
+            }
+            timed_request(requests, "POST", f"{self.api_url}/attendance/batch", "POST /attendance/batch", samples, json=payload, headers=headers)
+        return self.run_users(task)
+
+    def scenario_student_poll(self):
+        """StudentDashboard's 30-second poll"""
+        if not self.student_sessions:
+            self.student_sessions = self.campus.student_tokens(min(self.users, len(self.campus.students)))
+        def task(user_index, iteration, samples):
+            student, token = self.student_sessions[user_index % len(self.student_sessions)]
+            headers = self.headers(token)
+            with requests.Session() as session:
+                for endpoint, path in (
+                    ("GET /students/{id}/attendance", f"/students/{student['id']}/attendance?limit=20"),
+                    ("GET /students/{id}/attendance/summary", f"/students/{student['id']}/attendance/summary"),
+                    ("GET /students/{id}/marks", f"/students/{student['id']}/marks"),
+                    ("GET /notices", "/notices"),
+                    ("GET /requests", "/requests"),
+                ):
+                    timed_request(session, "GET", f"{self.api_url}{path}", endpoint, samples, headers=headers)
+        return self.run_users(task)
+
+    def scenario_faculty_poll(self):
+        """FacultyDashboard's 30-second poll"""
+        headers = self.headers(self.campus.faculty_token)
+        def task(user_index, iteration, samples):
+            with requests.Session() as session:
+                for path in ("/students", "/requests", "/notices", "/attendance", "/complaints", "/marks"):
+                    timed_request(session, "GET", f"{self.api_url}{path}", f"GET {path}", samples, headers=headers)
+        return self.run_users(task)
+
+    def scenario_admin_analytics(self):
+        """AdminDashboard's analytics card"""
+        headers = self.headers(self.campus.admin_token)
+        def task(user_index, iteration, samples):
+            timed_request(requests, "GET", f"{self.api_url}/admin/analytics", "GET /admin/analytics", samples, headers=headers)
+        return self.run_users(task)
+
+    def scenario_login_storm(self):
+        """Every virtual user logging in over and over, as at the start of a class"""
+        def task(user_index, iteration, samples):
+            student = self.campus.students[(user_index * self.iterations + iteration) % len(self.campus.students)]
+            credentials = {"email": student["email"], "password": LOAD_TEST_PASSWORD}
+            timed_request(requests, "POST", f"{self.api_url}/auth/login", "POST /auth/login", samples, json=credentials)
+        return self.run_users(task)
+
+    def run(self, scenario_names):
+        results = {}
+        for name in scenario_names:
+            print(f"🔍 Running {name} ({self.users} users x {self.iterations} iterations)...")
+            samples, elapsed = getattr(self, f"scenario_{name}")()
+            results[name] = report_samples(samples, elapsed)
+            for endpoint, metrics in results[name].items():
+                print(f"📊 {endpoint}: {metrics['rps']} req/s  p50 {metrics['p50_ms']}ms  p95 {metrics['p95_ms']}ms  p99 {metrics['p99_ms']}ms  errors {metrics['errors']}")
+        return results
+
+# Batch attendance runs first so the polls read a populated section
+SCENARIOS = ["batch_attendance", "student_poll", "faculty_poll", "admin_analytics", "login_storm"]
+
+def report_samples(samples, elapsed):
+    """Per-endpoint throughput, latency percentiles and error counts"""
+    by_endpoint = {}
+    for endpoint, latency, status_code in samples:
+        by_endpoint.setdefault(endpoint, []).append((latency, status_code))
+    report = {}
+    for endpoint, rows in by_endpoint.items():
+        status_counts = {}
+        for _, status_code in rows:
+            status_counts[str(status_code)] = status_counts.get(str(status_code), 0) + 1
+        report[endpoint] = {
+            **summarize([latency for latency, _ in rows]),
+            "rps": round(len(rows) / elapsed, 1) if elapsed else 0.0,
+            "errors": sum(1 for _, status_code in rows if status_code == 0 or status_code >= 400),
+            "status_counts": status_counts
+        }
+    return report
+
+def compare_to_baseline(results, baseline, tolerance):
+    """List endpoints whose p95 grew or throughput fell by more than `tolerance` against the baseline"""
+    regressions = []
+    for scenario, endpoints in results.items():
+        for endpoint, metrics in endpoints.items():
+            previous = baseline.get(scenario, {}).get(endpoint)
+            if not previous:
+                continue
+            if previous["p95_ms"] and metrics["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{scenario} {endpoint}: p95 {previous['p95_ms']}ms -> {metrics['p95_ms']}ms")
+            if previous["rps"] and metrics["rps"] < previous["rps"] * (1 - tolerance):
+                regressions.append(f"{scenario} {endpoint}: {previous['rps']} -> {metrics['rps']} req/s")
+            if metrics["errors"] > previous["errors"]:
+                regressions.append(f"{scenario} {endpoint}: errors {previous['errors']} -> {metrics['errors']}")
+    return regressions
+
+def run_dashboard_scenarios(args, base_url):
+    api_url = f"{base_url}/api"
+    campus = LoadTestCampus(api_url, args.mongo_url, args.db_name, students=args.students)
+    campus.seed()
+    return DashboardLoadTest(api_url, campus, users=args.users, iterations=args.iterations).run(
+        [name for name in args.scenarios if name in SCENARIOS]
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Digital Campus load tests")
+    parser.add_argument("scenarios", nargs="*", default=SCENARIOS, help=f"Scenarios from {', '.join(SCENARIOS + ['login_burst'])} (default: all but login_burst)")
+    parser.add_argument("--base-url", default=None, help="Test an already running server instead of starting one locally")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the locally started server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the locally started server")
+    parser.add_argument("--mongo-url", default=None, help="MongoDB for the local server (default mongodb://localhost:27017); with --base-url, the one that server uses")
+    parser.add_argument("--db-name", default=None, help="Database for the local server, dropped first (default campus_loadtest); with --base-url, the one that server uses")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users per scenario")
+    parser.add_argument("--iterations", type=int, default=10, help="Iterations per virtual user")
+    parser.add_argument("--students", type=int, default=60, help="Students in the seeded section")
+    parser.add_argument("--logins", type=int, default=200, help="login_burst: logins in the burst")
+    parser.add_argument("--concurrency", type=int, default=50, help="login_burst: concurrent logins")
+    parser.add_argument("--logins-per-account", type=int, default=5, help="login_burst: logins per throwaway account, kept under the server's per-account login limit")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--save-baseline", default=None, help="Write results as the baseline to this path")
+    parser.add_argument("--baseline", default=None, help="Compare against this baseline and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional p95/throughput change against the baseline")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS and name != "login_burst"]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    if args.base_url and any(name in SCENARIOS for name in args.scenarios) and not (args.mongo_url and args.db_name):
+        parser.error("--base-url needs the --mongo-url and --db-name the server uses, since students are seeded directly")
+    args.mongo_url = args.mongo_url or "mongodb://localhost:27017"
+    args.db_name = args.db_name or "campus_loadtest"
+
+    def run_all(base_url):
+        results = {}
+        if any(name in SCENARIOS for name in args.scenarios):
+            results.update(run_dashboard_scenarios(args, base_url))
+        if "login_burst" in args.scenarios:
+            results["login_burst"] = LoginBurstBenchmark(base_url, logins=args.logins, concurrency=args.concurrency, logins_per_account=args.logins_per_account).run()
+        return results
+
+    print("🚀 Starting load tests...")
+    if args.base_url:
+        print(f"Testing against: {args.base_url}")
+        results = run_all(args.base_url)
+    else:
+        with LocalServer(args.port, args.workers, args.mongo_url, args.db_name) as server:
+            print(f"Testing against local server: {server.base_url} ({args.workers} workers, db {args.db_name})")
+            results = run_all(server.base_url)
+
+    document = {"results": results, "timestamp": datetime.now().isoformat()}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"💾 Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline({name: endpoints for name, endpoints in results.items() if name in SCENARIOS}, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
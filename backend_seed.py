@@ -0,0 +1,382 @@
+"""Seed MongoDB with a synthetic campus for scale testing.
+
+Documents have the exact shapes server.py writes (User, AttendanceRecord, MarksRecord,
+Notice, Request, Complaint), including native datetimes, year/section/department and
+updated_at. Attendance follows ATTENDANCE_STORAGE, so "sessions" deployments get
+sessions and rosters instead of per-student records. Everything, ids and password
+salts included, derives from --seed, so a given command line always produces the
+same campus.
+
+Uses the same MONGO_URL/DB_NAME as the backend (backend/.env). For roughly 20k
+students and 10M attendance rows:
+
+    python backend_seed.py --drop --departments 6 --sections 14 --days 85
+"""
+import os
+import sys
+import uuid
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+
+import bcrypt
+
+import server
+
+DEPARTMENTS = [
+    ("CSE", "Computer Science"),
+    ("ECE", "Electronics and Communication"),
+    ("EEE", "Electrical and Electronics"),
+    ("MECH", "Mechanical"),
+    ("CIVIL", "Civil"),
+    ("IT", "Information Technology"),
+    ("AIDS", "AI and Data Science"),
+    ("CHEM", "Chemical"),
+]
+FIRST_NAMES = ["Aarav", "Ananya", "Arjun", "Diya", "Ishaan", "Kavya", "Krishna", "Meera", "Nikhil", "Pooja",
+               "Rahul", "Sai", "Sneha", "Tejas", "Varun", "Divya", "Harsha", "Lakshmi", "Rohit", "Swathi"]
+LAST_NAMES = ["Reddy", "Sharma", "Naidu", "Rao", "Kumar", "Patel", "Iyer", "Singh", "Varma", "Chowdary"]
+EXAM_MAX_MARKS = {"Mid 1": 30.0, "Mid 2": 30.0, "Assignment": 10.0, "Semester": 100.0}
+REQUEST_TYPES = ["od", "leave", "grievance", "certificate"]
+BCRYPT_SALT_CHARS = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+def make_id(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def make_password_hash(rng, password):
+    """bcrypt hash with a salt drawn from rng, so reseeding reproduces it"""
+    # The last salt character only carries two bits, so it must be one of . O e u
+    salt = "$2b$12$" + "".join(rng.choice(BCRYPT_SALT_CHARS) for _ in range(21)) + rng.choice(".Oeu")
+    return bcrypt.hashpw(password.encode('utf-8'), salt.encode('ascii')).decode('utf-8')
+
+def section_label(index):
+    """A, B, ..., Z, AA, AB, ... so sections stay unique within a year across departments"""
+    label = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord('A') + remainder) + label
+    return label
+
+def teaching_days(start, count):
+    days = []
+    day = start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+class BulkInserter:
+    """Unordered insert_many in fixed-size chunks, with a bounded number of writes in flight"""
+
+    def __init__(self, batch_size, concurrency):
+        self.batch_size = batch_size
+        self.slots = asyncio.Semaphore(concurrency)
+        self.pending = set()
+        self.counts = {}
+
+    async def insert(self, collection, docs):
+        for i in range(0, len(docs), self.batch_size):
+            await self.slots.acquire()
+            task = asyncio.create_task(self.write(collection, docs[i:i + self.batch_size]))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+    async def write(self, collection, chunk):
+        try:
+            await collection.insert_many(chunk, ordered=False)
+            self.counts[collection.name] = self.counts.get(collection.name, 0) + len(chunk)
+        finally:
+            self.slots.release()
+
+    async def flush(self):
+        while self.pending:
+            await asyncio.gather(*list(self.pending))
+
+class CampusSeeder:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.inserter = BulkInserter(args.batch_size, args.concurrency)
+        self.semester_start = datetime.strptime(args.semester_start, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        self.days = teaching_days(self.semester_start, args.days)
+        self.password_hash = make_password_hash(self.rng, args.password)
+        self.faculty = {}
+        self.admins = []
+
+    def person_name(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def user_doc(self, role, email, name, created_at, **fields):
+        return {
+            "id": make_id(self.rng),
+            "email": email,
+            "name": name,
+            "role": role,
+            "background_image_url": None,
+            "profile_image_url": None,
+            "department": fields.get("department"),
+            "year": fields.get("year"),
+            "section": fields.get("section"),
+            "roll_number": fields.get("roll_number"),
+            "employee_id": fields.get("employee_id"),
+            "mobile_number": fields.get("mobile_number"),
+            "created_at": created_at,
+            "password_hash": self.password_hash
+        }
+
+    async def seed_staff(self):
+        created_at = self.semester_start - timedelta(days=30)
+        docs = []
+        for code, department in DEPARTMENTS[:self.args.departments]:
+            self.faculty[code] = []
+            for i in range(self.args.faculty_per_department):
+                doc = self.user_doc(
+                    "faculty", f"{code.lower()}.faculty{i}@university.edu", self.person_name(), created_at,
+                    department=department, employee_id=f"{code}{i:03d}"
+                )
+                self.faculty[code].append(doc)
+                docs.append(doc)
+        admin = self.user_doc("admin", "admin@university.edu", "Campus Admin", created_at, employee_id="9")
+        self.admins.append(admin)
+        docs.append(admin)
+        await self.inserter.insert(server.db.users, docs)
+
+    def section_students(self, code, department, year, section):
+        created_at = self.semester_start - timedelta(days=30)
+        students = []
+        for i in range(self.args.students_per_section):
+            roll_number = f"{code}{year}{section}{i + 1:03d}"
+            students.append(self.user_doc(
+                "student", f"{roll_number.lower()}@university.edu", self.person_name(), created_at,
+                department=department, year=year, section=section, roll_number=roll_number,
+                mobile_number=f"9{self.rng.randrange(10 ** 9):09d}"
+            ))
+        return students
+
+    def attendance_records(self, students, subjects, faculty, placement):
+        # Each student gets a steady attendance rate, so some fall below the shortage threshold
+        rates = [self.rng.uniform(0.55, 0.98) for _ in students]
+        random_value = self.rng.random
+        docs = []
+        for date in self.days:
+            for period, subject in enumerate(subjects[:self.args.periods]):
+                teacher = faculty[period % len(faculty)]
+                created_at = date + timedelta(hours=9 + period, minutes=5)
+                for student, rate in zip(students, rates):
+                    docs.append({
+                        "id": make_id(self.rng),
+                        "student_id": student["id"],
+                        "student_name": student["name"],
+                        "subject": subject,
+                        "date": date,
+                        "status": "present" if random_value() < rate else "absent",
+                        "marked_by": teacher["id"],
+                        "marked_by_name": teacher["name"],
+                        **placement,
+                        "created_at": created_at,
+                        "updated_at": created_at
+                    })
+        return docs, rates
+
+    def attendance_sessions(self, students, subjects, faculty, placement):
+        rates = [self.rng.uniform(0.55, 0.98) for _ in students]
+        student_ids = [student["id"] for student in students]
+        student_names = [student["name"] for student in students]
+        roster = {"id": server.roster_id_for(student_ids, student_names), "student_ids": student_ids, "student_names": student_names}
+        random_value = self.rng.random
+        sessions = []
+        for date in self.days:
+            for period, subject in enumerate(subjects[:self.args.periods]):
+                teacher = faculty[period % len(faculty)]
+                created_at = date + timedelta(hours=9 + period, minutes=5)
+                sessions.append({
+                    "id": make_id(self.rng),
+                    "year": placement["year"],
+                    "section": placement["section"],
+                    "subject": subject,
+                    "date": date,
+                    "roster_id": roster["id"],
+                    "present": server.pack_presence([random_value() < rate for rate in rates]),
+                    "department": placement["department"],
+                    "marked_by": teacher["id"],
+                    "marked_by_name": teacher["name"],
+                    "created_at": created_at,
+                    "updated_at": created_at
+                })
+        return roster, sessions, rates
+
+    def marks_records(self, students, subjects, faculty, placement, rates):
+        exam_types = self.args.exam_types
+        docs = []
+        for exam_index, exam_type in enumerate(exam_types):
+            max_marks = EXAM_MAX_MARKS.get(exam_type, 100.0)
+            created_at = self.days[min(len(self.days) - 1, (exam_index + 1) * len(self.days) // (len(exam_types) + 1))] + timedelta(hours=16)
+            for subject_index, subject in enumerate(subjects):
+                teacher = faculty[subject_index % len(faculty)]
+                for student, rate in zip(students, rates):
+                    # Students who attend more tend to score more
+                    fraction = min(1.0, max(0.0, self.rng.gauss(0.35 + 0.4 * rate, 0.12)))
+                    docs.append({
+                        "id": make_id(self.rng),
+                        "student_id": student["id"],
+                        "student_name": student["name"],
+                        "subject": subject,
+                        "marks": round(fraction * max_marks * 2) / 2,
+                        "max_marks": max_marks,
+                        "exam_type": exam_type,
+                        "marked_by": teacher["id"],
+                        "marked_by_name": teacher["name"],
+                        **placement,
+                        "created_at": created_at,
+                        "updated_at": created_at
+                    })
+        return docs
+
+    def student_requests(self, students, placement, faculty):
+        docs = []
+        for student in students:
+            if self.rng.random() >= self.args.request_rate:
+                continue
+            start = self.rng.choice(self.days)
+            request_status = self.rng.choices(["pending", "approved", "rejected"], weights=[3, 5, 2])[0]
+            reviewer = self.rng.choice(faculty) if request_status != "pending" else None
+            docs.append({
+                "id": make_id(self.rng),
+                "student_id": student["id"],
+                "student_name": student["name"],
+                "roll_number": student["roll_number"],
+                "request_type": self.rng.choice(REQUEST_TYPES),
+                "reason": f"Synthetic request from {student['roll_number']}",
+                "start_date": start.strftime("%Y-%m-%d"),
+                "end_date": (start + timedelta(days=self.rng.randrange(3))).strftime("%Y-%m-%d"),
+                "status": request_status,
+                "approved_by": reviewer["id"] if reviewer else None,
+                "approved_by_name": reviewer["name"] if reviewer else None,
+                "admin_comment": None,
+                **placement,
+                "created_at": start - timedelta(hours=self.rng.randrange(12, 48))
+            })
+        return docs
+
+    def section_complaints(self, placement):
+        count = sum(1 for _ in range(self.args.students_per_section) if self.rng.random() < self.args.complaint_rate)
+        return [
+            {
+                "id": make_id(self.rng),
+                "content": f"Synthetic complaint {i + 1} from year {placement['year']} section {placement['section']}",
+                "submitted_by_role": "student",
+                **placement,
+                "created_at": self.rng.choice(self.days) + timedelta(hours=self.rng.randrange(8, 20))
+            }
+            for i in range(count)
+        ]
+
+    async def seed_sections(self):
+        sessions_storage = server.ATTENDANCE_STORAGE == "sessions"
+        for dept_index, (code, department) in enumerate(DEPARTMENTS[:self.args.departments]):
+            faculty = self.faculty[code]
+            for year in range(1, self.args.years + 1):
+                subjects = [f"{code}{year}{n:02d}" for n in range(1, self.args.subjects + 1)]
+                for section_index in range(self.args.sections):
+                    section = section_label(dept_index * self.args.sections + section_index)
+                    placement = {"year": year, "section": section, "department": department}
+                    students = self.section_students(code, department, year, section)
+                    await self.inserter.insert(server.db.users, students)
+                    if sessions_storage:
+                        roster, sessions, rates = self.attendance_sessions(students, subjects, faculty, placement)
+                        await self.inserter.insert(server.db.attendance_rosters, [roster])
+                        await self.inserter.insert(server.db.attendance_sessions, sessions)
+                    else:
+                        attendance, rates = self.attendance_records(students, subjects, faculty, placement)
+                        await self.inserter.insert(server.db.attendance, attendance)
+                    await self.inserter.insert(server.db.marks, self.marks_records(students, subjects, faculty, placement, rates))
+                    await self.inserter.insert(server.db.requests, self.student_requests(students, placement, faculty))
+                    await self.inserter.insert(server.db.complaints, self.section_complaints(placement))
+                print(f"🌱 {code} year {year}: {self.args.sections} sections seeded, {self.inserter.counts} so far")
+
+    async def seed_notices(self):
+        posters = [teacher for faculty in self.faculty.values() for teacher in faculty] + self.admins
+        targets = [["student"], ["faculty"], ["student", "faculty"], ["student", "faculty", "admin"]]
+        docs = []
+        for i in range(self.args.notices):
+            poster = self.rng.choice(posters)
+            docs.append({
+                "id": make_id(self.rng),
+                "title": f"Notice {i + 1}: {self.rng.choice(['Exam schedule', 'Holiday', 'Workshop', 'Fee payment', 'Placement drive', 'Sports meet'])}",
+                "content": f"Synthetic notice {i + 1} posted for scale testing.",
+                "posted_by": poster["id"],
+                "posted_by_name": poster["name"],
+                "role_target": self.rng.choice(targets),
+                "created_at": self.rng.choice(self.days) + timedelta(hours=self.rng.randrange(8, 18))
+            })
+        await self.inserter.insert(server.db.notices, docs)
+        await self.inserter.insert(server.db.notice_search, [entry for doc in docs for entry in server.notice_search_entries(doc)])
+
+    async def run(self):
+        if self.args.drop:
+            for collection_name in ("users", "attendance", "attendance_sessions", "attendance_rosters", "marks",
+                                    "notices", "notice_search", "requests", "complaints", "analytics", "attendance_defaulters"):
+                await server.db[collection_name].drop()
+        started = time.perf_counter()
+        await self.seed_staff()
+        await self.seed_sections()
+        await self.seed_notices()
+        await self.inserter.flush()
+        inserted_seconds = time.perf_counter() - started
+
+        # Building indexes once after the bulk load is much faster than maintaining them per insert
+        await server.ensure_indexes()
+        await server.rebuild_analytics()
+        total_seconds = time.perf_counter() - started
+
+        total = sum(self.inserter.counts.values())
+        print(f"✅ Inserted {total} documents in {inserted_seconds:.1f}s ({total / inserted_seconds:,.0f} docs/s), indexed in {total_seconds - inserted_seconds:.1f}s")
+        for collection_name, count in sorted(self.inserter.counts.items()):
+            print(f"📊 {collection_name}: {count}")
+        print(f"🔐 Every account's password is {self.args.password!r}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic Smart Digital Campus into MongoDB")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--departments", type=int, default=4, help=f"Departments, up to {len(DEPARTMENTS)}")
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--sections", type=int, default=2, help="Sections per department per year")
+    parser.add_argument("--students-per-section", type=int, default=60)
+    parser.add_argument("--faculty-per-department", type=int, default=12)
+    parser.add_argument("--subjects", type=int, default=6, help="Subjects per department per year")
+    parser.add_argument("--periods", type=int, default=6, help="Classes per section per teaching day")
+    parser.add_argument("--days", type=int, default=90, help="Teaching days (weekdays) of attendance")
+    parser.add_argument("--semester-start", default="2025-01-06")
+    parser.add_argument("--exam-types", type=lambda value: value.split(","), default=list(EXAM_MAX_MARKS))
+    parser.add_argument("--notices", type=int, default=500)
+    parser.add_argument("--request-rate", type=float, default=0.5, help="Fraction of students with a request")
+    parser.add_argument("--complaint-rate", type=float, default=0.05, help="Fraction of students with a complaint")
+    parser.add_argument("--password", default="Campus123!")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many calls in flight")
+    parser.add_argument("--drop", action="store_true", help="Drop the seeded collections first")
+    args = parser.parse_args()
+
+    if not 1 <= args.departments <= len(DEPARTMENTS):
+        parser.error(f"--departments must be between 1 and {len(DEPARTMENTS)}")
+
+    if args.periods > args.subjects:
+        parser.error("--periods can't exceed --subjects; a subject is marked at most once per day")
+
+    students = args.departments * args.years * args.sections * args.students_per_section
+    print(f"🚀 Seeding {students} students and {students * args.days * args.periods} attendance rows into {os.environ['DB_NAME']}...")
+    try:
+        asyncio.run(CampusSeeder(args).run())
+    finally:
+        server.client.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
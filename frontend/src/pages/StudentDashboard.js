@@ -25,6 +25,7 @@ const API = `${API_BASE_URL}/api`;
 const StudentDashboard = () => {
   const { user, token, login } = useAuth();
   const [attendance, setAttendance] = useState([]);
+  const [attendanceSummary, setAttendanceSummary] = useState({ present: 0, total: 0, percentage: 0, subjects: [] });
   const [marks, setMarks] = useState([]);
   const [notices, setNotices] = useState([]);
   const [requests, setRequests] = useState([]);
@@ -51,14 +52,16 @@ const StudentDashboard = () => {
   const loadData = useCallback(async () => {
     try {
       const headers = { Authorization: `Bearer ${token}` };
-      const [attendanceRes, marksRes, noticesRes, requestsRes] = await Promise.all([
-        axios.get(`${API}/students/${user.id}/attendance`, { headers }),
+      const [attendanceRes, attendanceSummaryRes, marksRes, noticesRes, requestsRes] = await Promise.all([
+        axios.get(`${API}/students/${user.id}/attendance?limit=20`, { headers }),
+        axios.get(`${API}/students/${user.id}/attendance/summary`, { headers }),
         axios.get(`${API}/students/${user.id}/marks`, { headers }),
         axios.get(`${API}/notices`, { headers }),
         axios.get(`${API}/requests`, { headers })
       ]);
       
       setAttendance(attendanceRes.data);
+      setAttendanceSummary(attendanceSummaryRes.data);
       setMarks(marksRes.data);
       setNotices(noticesRes.data);
       setRequests(requestsRes.data);
@@ -176,28 +179,17 @@ const StudentDashboard = () => {
     }
   };
 
-  const attendanceRate = attendance.length > 0
-    ? ((attendance.filter(a => a.status === "present").length / attendance.length) * 100).toFixed(1)
+  const attendanceRate = attendanceSummary.total > 0
+    ? attendanceSummary.percentage.toFixed(1)
     : 0;
 
   const averageMarks = marks.length > 0
     ? (marks.reduce((acc, m) => acc + (m.marks / m.max_marks) * 100, 0) / marks.length).toFixed(1)
     : 0;
 
-  const attendanceBySubject = attendance.reduce((acc, record) => {
-    if (!acc[record.subject]) {
-      acc[record.subject] = { total: 0, present: 0 };
-    }
-    acc[record.subject].total++;
-    if (record.status === 'present') {
-      acc[record.subject].present++;
-    }
-    return acc;
-  }, {});
-
-  const attendanceChartData = Object.keys(attendanceBySubject).map(subject => ({
-    name: subject,
-    Attendance: parseFloat(((attendanceBySubject[subject].present / attendanceBySubject[subject].total) * 100).toFixed(1)),
+  const attendanceChartData = attendanceSummary.subjects.map(subject => ({
+    name: subject.subject,
+    Attendance: parseFloat(subject.percentage.toFixed(1)),
   }));
 
   const marksChartData = marks.map(record => ({
@@ -580,7 +572,7 @@ const StudentDashboard = () => {
             </CardHeader>
             <CardContent>
               <div className="text-3xl font-heading font-bold text-primary">{attendanceRate}%</div>
-              <p className="text-xs text-muted-foreground mt-1">{attendance.length} classes recorded</p>
+              <p className="text-xs text-muted-foreground mt-1">{attendanceSummary.total} classes recorded</p>
             </CardContent>
           </Card>
 
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# server.py reads these at import time; the Motor client only connects on first use
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'campus_test')
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+# The benchmark scripts at the repository root share their test doubles with the tests
+sys.path.insert(0, str(Path(__file__).parent.parent))
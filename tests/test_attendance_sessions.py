@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+
+import server
+
+
+def make_record(student_id, status, name=None):
+    return {"student_id": student_id, "student_name": name or f"Student {student_id}", "status": status}
+
+
+def test_pack_presence_round_trip():
+    for size in (0, 1, 7, 8, 9, 60, 64, 65):
+        present = [index % 3 != 0 for index in range(size)]
+        bitmap = server.pack_presence(present)
+        assert len(bitmap) == (size + 7) // 8
+        assert server.unpack_presence(bitmap, size) == present
+
+
+def test_pack_presence_bit_order():
+    assert server.pack_presence([True, False, False, False, False, False, False, False, True]) == bytes([0b00000001, 0b00000001])
+
+
+def test_merge_into_empty_session():
+    student_ids, student_names, present, results = server.merge_session_records(
+        [], [], [], [make_record("a", "present"), make_record("b", "absent")], "session-1"
+    )
+    assert student_ids == ["a", "b"]
+    assert student_names == ["Student a", "Student b"]
+    assert present == [True, False]
+    assert results == [("inserted", "session-1:0"), ("inserted", "session-1:1")]
+
+
+def test_merge_updates_existing_and_appends_new():
+    student_ids, student_names, present, results = server.merge_session_records(
+        ["a", "b"], ["Student a", "Student b"], [True, False],
+        [make_record("b", "present", "Renamed b"), make_record("c", "absent")], "session-1"
+    )
+    assert student_ids == ["a", "b", "c"]
+    assert student_names == ["Student a", "Renamed b", "Student c"]
+    assert present == [True, True, False]
+    assert results == [("updated", "session-1:1"), ("inserted", "session-1:2")]
+
+
+def test_merge_does_not_mutate_inputs():
+    student_ids, student_names, present = ["a"], ["Student a"], [False]
+    server.merge_session_records(student_ids, student_names, present, [make_record("a", "present"), make_record("b", "present")], "s")
+    assert (student_ids, student_names, present) == (["a"], ["Student a"], [False])
+
+
+def test_session_records_expand_roster():
+    roster = {"student_ids": ["a", "b", "c"], "student_names": ["A", "B", "C"]}
+    created_at = datetime(2025, 1, 6, 9, 5, tzinfo=timezone.utc)
+    session = {
+        "id": "session-1", "subject": "Maths", "date": datetime(2025, 1, 6), "year": 2, "section": "A",
+        "department": "CSE", "marked_by": "f1", "marked_by_name": "Faculty", "created_at": created_at,
+        "present": server.pack_presence([True, False, True])
+    }
+    records = server.session_records(session, roster)
+    assert [(r["id"], r["student_id"], r["status"]) for r in records] == [
+        ("session-1:0", "a", "present"), ("session-1:1", "b", "absent"), ("session-1:2", "c", "present")
+    ]
+    assert all(r["date"] == "2025-01-06" and r["subject"] == "Maths" and r["created_at"] == created_at for r in records)
+    # Every field an AttendanceRecord response needs is present
+    server.AttendanceRecord(**records[0])
+
+
+def test_session_records_for_one_student():
+    roster = {"student_ids": ["a", "b"], "student_names": ["A", "B"]}
+    session = {"id": "s", "subject": "Maths", "date": "2025-01-06", "created_at": datetime(2025, 1, 6), "present": server.pack_presence([False, True])}
+    records = server.session_records(session, roster, student_id="b")
+    assert len(records) == 1
+    assert records[0]["id"] == "s:1" and records[0]["status"] == "present"
@@ -0,0 +1,33 @@
+"""Defaulter tally columns and the per-chunk tally, which run off the event loop."""
+import server
+
+
+def record(student_id, subject, status):
+    return {"student_id": student_id, "subject": subject, "status": status, "student_name": f"Student {student_id}",
+            "year": 2, "section": "A", "department": "CSE"}
+
+
+def test_tally_accumulates_across_chunks():
+    tallies = {}
+    server.tally_chunk(tallies, server.record_columns([
+        record("a", "Maths", "present"), record("a", "Maths", "absent"), record("b", "Maths", "present")
+    ]))
+    server.tally_chunk(tallies, server.record_columns([record("a", "Maths", "present"), record("a", "Physics", "absent")]))
+    assert {key: (tally["present"], tally["total"]) for key, tally in tallies.items()} == {
+        ("a", "Maths"): (2, 3), ("b", "Maths"): (1, 1), ("a", "Physics"): (0, 1)
+    }
+    assert tallies[("b", "Maths")]["student_name"] == "Student b"
+
+
+def test_session_columns_expand_rosters_and_filter_students():
+    rosters = {"r-1": {"student_ids": ["a", "b", "c"], "student_names": ["A", "B", "C"]}}
+    session = {"roster_id": "r-1", "subject": "Maths", "present": server.pack_presence([True, False, True]),
+               "year": 2, "section": "A", "department": "CSE"}
+    roster_arrays = {}
+    student_ids, subjects, present, names, *_ = server.session_columns([session, session], rosters, roster_arrays, None)
+    assert list(student_ids) == ["a", "b", "c", "a", "b", "c"]
+    assert list(present) == [True, False, True, True, False, True]
+    assert "r-1" in roster_arrays
+
+    filtered = server.session_columns([session], rosters, roster_arrays, server.np.array(["c"], dtype=object))
+    assert list(filtered[0]) == ["c"] and list(filtered[3]) == ["C"]
@@ -0,0 +1,182 @@
+"""EmailOutbox against a local stub of the Brevo API and a local MongoDB (skipped without one)."""
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+import server
+
+
+def mongo_available():
+    try:
+        MongoClient(os.environ['MONGO_URL'], serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not mongo_available(), reason="needs a local MongoDB at MONGO_URL")
+
+
+class StubBrevo:
+    """Records every JSON payload posted to it and answers with respond(payload) -> status code"""
+
+    def __init__(self, respond):
+        self.payloads = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                stub.payloads.append(payload)
+                status_code = respond(payload)
+                self.send_response(status_code)
+                self.send_header("content-type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v3/smtp/email"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def recipients(payload):
+    if "messageVersions" in payload:
+        return [version["to"][0]["email"] for version in payload["messageVersions"]]
+    return [payload["to"][0]["email"]]
+
+
+@pytest.fixture
+def run_outbox(monkeypatch):
+    """Run scenario(outbox, stub) against a fresh outbox collection and a stub answering with respond"""
+    stubs = []
+
+    def run(respond, scenario):
+        stub = StubBrevo(respond)
+        stubs.append(stub)
+        monkeypatch.setattr(server, "BREVO_API_URL", stub.url)
+        monkeypatch.setenv("BREVO_API_KEY", "test-key")
+
+        async def main():
+            # Motor clients are bound to the loop they first run on, so each test gets its own
+            client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+            monkeypatch.setattr(server, "db", client[os.environ['DB_NAME']])
+            await server.db.email_outbox.delete_many({})
+            outbox = server.EmailOutbox()
+            outbox.client = server.httpx.AsyncClient()
+            try:
+                return await scenario(outbox, stub)
+            finally:
+                await outbox.client.aclose()
+                await server.db.email_outbox.delete_many({})
+                client.close()
+
+        return asyncio.run(main())
+
+    yield run
+    for stub in stubs:
+        stub.close()
+
+
+async def enqueue(outbox, addresses):
+    for address in addresses:
+        await outbox.enqueue(address, "Subject", f"Code for {address}", html_body="<p>code</p>")
+
+
+async def statuses(outbox):
+    return {doc["to"]: doc async for doc in server.db.email_outbox.find({}, {"_id": 0})}
+
+
+def test_batch_sent_in_one_call_and_bodies_dropped(run_outbox):
+    async def scenario(outbox, stub):
+        await enqueue(outbox, ["a@x.edu", "b@x.edu", "c@x.edu"])
+        assert await outbox.drain_once() == 3
+        return stub.payloads, await statuses(outbox)
+
+    payloads, docs = run_outbox(lambda payload: 201, scenario)
+    assert len(payloads) == 1
+    assert sorted(recipients(payloads[0])) == ["a@x.edu", "b@x.edu", "c@x.edu"]
+    for doc in docs.values():
+        assert doc["status"] == "sent"
+        assert "finished_at" in doc and "sent_at" in doc
+        assert "text" not in doc and "html" not in doc and "claim" not in doc
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_retryable_errors_reschedule(run_outbox, status_code):
+    async def scenario(outbox, stub):
+        await enqueue(outbox, ["a@x.edu", "b@x.edu"])
+        before = datetime.now(timezone.utc)
+        await outbox.drain_once()
+        return before, stub.payloads, await statuses(outbox)
+
+    before, payloads, docs = run_outbox(lambda payload: status_code, scenario)
+    assert len(payloads) == 1
+    for doc in docs.values():
+        assert doc["status"] == "pending"
+        assert doc["attempts"] == 1
+        assert doc["next_attempt_at"].replace(tzinfo=timezone.utc) > before
+        assert doc["text"]
+        assert "finished_at" not in doc
+
+
+def test_retries_give_up_after_max_attempts(run_outbox, monkeypatch):
+    monkeypatch.setattr(server, "EMAIL_MAX_ATTEMPTS", 2)
+
+    async def scenario(outbox, stub):
+        await enqueue(outbox, ["a@x.edu"])
+        await outbox.drain_once()
+        await server.db.email_outbox.update_many({}, {"$set": {"next_attempt_at": datetime.now(timezone.utc)}})
+        await outbox.drain_once()
+        return await statuses(outbox)
+
+    docs = run_outbox(lambda payload: 500, scenario)
+    assert docs["a@x.edu"]["status"] == "failed"
+    assert docs["a@x.edu"]["attempts"] == 2
+    assert "text" not in docs["a@x.edu"]
+
+
+def test_rejected_batch_is_retried_one_by_one(run_outbox):
+    def respond(payload):
+        return 400 if "bad@x.edu" in recipients(payload) else 201
+
+    async def scenario(outbox, stub):
+        await enqueue(outbox, ["a@x.edu", "bad@x.edu", "c@x.edu"])
+        await outbox.drain_once()
+        return stub.payloads, await statuses(outbox)
+
+    payloads, docs = run_outbox(respond, scenario)
+    assert len(payloads) == 4
+    assert docs["a@x.edu"]["status"] == "sent"
+    assert docs["c@x.edu"]["status"] == "sent"
+    assert docs["bad@x.edu"]["status"] == "failed"
+    assert docs["bad@x.edu"]["last_error"].startswith("HTTP 400")
+
+
+def test_lease_blocks_other_claims_until_it_expires(run_outbox):
+    async def scenario(outbox, stub):
+        await enqueue(outbox, ["a@x.edu", "b@x.edu"])
+        claimed = await outbox.claim_batch()
+        assert len(claimed) == 2
+        # Another worker finds nothing while the lease holds
+        assert await server.EmailOutbox().claim_batch() == []
+        await server.db.email_outbox.update_many({}, {"$set": {"lease_expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+        reclaimed = await server.EmailOutbox().claim_batch()
+        assert sorted(m["to"] for m in reclaimed) == ["a@x.edu", "b@x.edu"]
+        assert {m["claim"] for m in reclaimed} != {m["claim"] for m in claimed}
+
+    run_outbox(lambda payload: 201, scenario)
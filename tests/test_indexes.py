@@ -0,0 +1,52 @@
+"""Every paginated list filter has an index whose equality prefix is followed by the sort."""
+from itertools import combinations
+
+import pytest
+
+import server
+
+
+def index_keys(collection_name):
+    return [list(index.document["key"].items()) for index in server.INDEX_SPECS[collection_name]]
+
+
+def placement_combinations(*fields):
+    """Filter field sets an endpoint accepts; section is only allowed together with year."""
+    return [
+        set(combo) for size in range(len(fields) + 1) for combo in combinations(fields, size)
+        if "section" not in combo or "year" in combo
+    ]
+
+
+def served(collection_name, equality_fields, sort):
+    for keys in index_keys(collection_name):
+        prefix = {field for field, _ in keys[:len(equality_fields)]}
+        if prefix == equality_fields and keys[len(equality_fields):] == sort:
+            return True
+    return False
+
+
+@pytest.mark.parametrize("fields", placement_combinations("year", "section"))
+def test_student_listing(fields):
+    assert served("users", {"role", *fields}, server.BY_ROLL_NUMBER)
+
+
+@pytest.mark.parametrize("collection_name, filters", [
+    ("marks", placement_combinations("subject", "year", "section")),
+    ("marks", placement_combinations("subject", "exam_type")),
+    ("attendance", placement_combinations("subject", "date")),
+    ("attendance", placement_combinations("year", "section")),
+    ("requests", placement_combinations("department", "year", "section")),
+    ("requests", placement_combinations("status", "request_type")),
+])
+def test_newest_first_listing(collection_name, filters):
+    for fields in filters:
+        if {"subject", "year"} <= fields:
+            continue  # served by the subject index with year applied as a filter
+        assert served(collection_name, fields, server.NEWEST_FIRST), fields
+
+
+def test_section_without_year_is_rejected():
+    with pytest.raises(server.HTTPException) as excinfo:
+        server.placement_query({}, None, "A")
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,18 @@
+"""Building the marks arrays from a cursor batch by batch."""
+import asyncio
+
+import server
+from backend_benchmark import ListCursor
+
+
+def test_arrays_grow_past_the_first_batch():
+    docs = [{"marks": float(i), "max_marks": 50.0} for i in range(7)]
+    marks, max_marks = asyncio.run(server.read_marks_arrays(ListCursor(docs), batch_size=3))
+    assert marks.tolist() == [float(i) for i in range(7)]
+    assert max_marks.tolist() == [50.0] * 7
+
+
+def test_empty_cursor_gives_empty_stats():
+    marks, max_marks = asyncio.run(server.read_marks_arrays(ListCursor([])))
+    assert marks.size == 0 and max_marks.size == 0
+    assert server.compute_marks_stats(marks, max_marks).count == 0
@@ -0,0 +1,31 @@
+"""Upserts on a record's natural key."""
+from datetime import datetime, timezone
+
+import server
+
+
+def attendance_doc():
+    return {
+        "id": "a-1", "student_id": "s-1", "subject": "Maths", "status": "present",
+        "date": datetime(2025, 1, 6, tzinfo=timezone.utc),
+        "created_at": datetime(2025, 1, 6, 9, tzinfo=timezone.utc)
+    }
+
+
+def test_date_key_matches_legacy_string_and_writes_native_date():
+    key, update = server.natural_key_upsert(attendance_doc(), server.NATURAL_KEYS["attendance"])
+    assert key == {
+        "student_id": "s-1", "subject": "Maths",
+        "date": {"$in": ["2025-01-06", datetime(2025, 1, 6, tzinfo=timezone.utc)]}
+    }
+    assert update["$set"]["date"] == datetime(2025, 1, 6, tzinfo=timezone.utc)
+    assert update["$set"]["status"] == "present"
+    assert update["$setOnInsert"] == {"id": "a-1", "created_at": datetime(2025, 1, 6, 9, tzinfo=timezone.utc)}
+
+
+def test_plain_key_fields_stay_equality_matches():
+    doc = {"id": "m-1", "student_id": "s-1", "subject": "Maths", "exam_type": "mid", "marks": 40,
+           "created_at": datetime(2025, 1, 6, tzinfo=timezone.utc)}
+    key, update = server.natural_key_upsert(doc, server.NATURAL_KEYS["marks"])
+    assert key == {"student_id": "s-1", "subject": "Maths", "exam_type": "mid"}
+    assert "subject" not in update["$set"]
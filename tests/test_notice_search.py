@@ -0,0 +1,54 @@
+"""Per-role copies of notices backing the role-prefixed text index."""
+import asyncio
+
+import server
+
+
+def test_one_entry_per_targeted_role():
+    notice = {"_id": "stamped-by-insert", "id": "n-1", "title": "Holiday", "content": "Closed", "role_target": ["student", "faculty", "student"]}
+    entries = server.notice_search_entries(notice)
+    assert [entry["role"] for entry in entries] == ["student", "faculty"]
+    for entry in entries:
+        assert "_id" not in entry
+        assert entry["role_target"] == notice["role_target"]
+        assert entry["title"] == "Holiday"
+
+
+def test_untargeted_notice_is_not_searchable():
+    assert server.notice_search_entries({"id": "n-1", "role_target": []}) == []
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.inserted = []
+
+    async def insert_one(self, doc):
+        self.inserted.append(doc)
+
+    async def insert_many(self, docs):
+        if not docs:
+            raise TypeError("documents must be a non-empty list")
+        self.inserted.extend(docs)
+
+
+class RecordingDatabase:
+    def __init__(self):
+        self.notices = RecordingCollection()
+        self.notice_search = RecordingCollection()
+
+
+def test_notice_without_target_roles_is_created(monkeypatch):
+    database = RecordingDatabase()
+    bumps = []
+
+    async def bump(increments):
+        bumps.append(increments)
+
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "bump_analytics_counters", bump)
+    poster = server.User(email="faculty@x.edu", name="Faculty One", role="faculty")
+    notice = asyncio.run(server.create_notice(server.NoticeCreate(title="Draft", content="Not yet", role_target=[]), poster))
+
+    assert [doc["id"] for doc in database.notices.inserted] == [notice.id]
+    assert database.notice_search.inserted == []
+    assert bumps == [{"notices": 1}]
@@ -0,0 +1,59 @@
+"""The in-process OTP store and the OTP email text."""
+import asyncio
+
+import pytest
+
+import server
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "monotonic", clock)
+    return clock
+
+
+def test_otp_is_single_use(clock):
+    store = server.MemoryOTPStore()
+    asyncio.run(store.issue("a@x.edu", "123456"))
+    assert asyncio.run(store.verify("a@x.edu", "123456"))
+    assert not asyncio.run(store.verify("a@x.edu", "123456"))
+
+
+def test_otp_expires_after_ttl(clock, monkeypatch):
+    monkeypatch.setattr(server, "OTP_TTL_SECONDS", 60)
+    store = server.MemoryOTPStore()
+    asyncio.run(store.issue("a@x.edu", "123456"))
+    clock.now += 60
+    assert not asyncio.run(store.verify("a@x.edu", "123456"))
+
+
+def test_otp_locks_after_max_attempts(clock, monkeypatch):
+    monkeypatch.setattr(server, "OTP_MAX_ATTEMPTS", 3)
+    store = server.MemoryOTPStore()
+    asyncio.run(store.issue("a@x.edu", "123456"))
+    for _ in range(3):
+        assert not asyncio.run(store.verify("a@x.edu", "000000"))
+    assert not asyncio.run(store.verify("a@x.edu", "123456"))
+
+
+def test_reissue_replaces_the_previous_code(clock):
+    store = server.MemoryOTPStore()
+    asyncio.run(store.issue("a@x.edu", "111111"))
+    asyncio.run(store.issue("a@x.edu", "222222"))
+    assert not asyncio.run(store.verify("a@x.edu", "111111"))
+    assert asyncio.run(store.verify("a@x.edu", "222222"))
+
+
+def test_email_states_the_configured_validity():
+    html = server.get_email_html("Verification Code", "Use this code.", "123456")
+    assert f"valid for {server.OTP_VALIDITY_TEXT}" in html
+    assert "123456" in html
@@ -0,0 +1,32 @@
+"""Keyset cursor decoding and the query that resumes after a cursor."""
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def encode(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("values", [["a"], [{"$date": "not a date"}, "x"], [{"$date": 5}, "x"]])
+def test_malformed_cursor_is_rejected(values):
+    with pytest.raises(HTTPException) as excinfo:
+        server.decode_cursor(encode(values), 2)
+    assert excinfo.value.status_code == 400
+
+
+def test_null_ascending_boundary_continues_into_non_null_values():
+    query = server.keyset_query(server.BY_ROLL_NUMBER, encode([None, "s-1"]))
+    assert {"roll_number": {"$ne": None}} in query["$or"]
+    assert {"roll_number": None, "id": {"$gt": "s-1"}} in query["$or"]
+
+
+def test_descending_boundary_includes_trailing_nulls():
+    sort = [("roll_number", server.DESCENDING), ("id", server.ASCENDING)]
+    query = server.keyset_query(sort, encode(["CS-010", "s-1"]))
+    assert {"roll_number": {"$lt": "CS-010"}} in query["$or"]
+    assert {"roll_number": None} in query["$or"]
@@ -0,0 +1,89 @@
+"""In-memory token buckets and client IP resolution behind proxies."""
+import asyncio
+
+import pytest
+
+import server
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "monotonic", clock)
+    monkeypatch.setattr(server, "RATE_LIMIT_STORE", "memory")
+    return clock
+
+
+def test_bucket_allows_limit_then_refills_continuously(clock):
+    limiter = server.RateLimiter("test", 3, 60)
+    for _ in range(3):
+        assert limiter._take_local("k") == 0.0
+    assert limiter._take_local("k") == pytest.approx(20.0)
+    clock.now += 20
+    assert limiter._take_local("k") == 0.0
+    assert limiter._take_local("k") > 0
+
+
+def test_keys_have_separate_buckets(clock):
+    limiter = server.RateLimiter("test", 1, 60)
+    assert limiter._take_local("a") == 0.0
+    assert limiter._take_local("b") == 0.0
+    assert limiter._take_local("a") > 0
+
+
+def test_rejection_carries_retry_after_rounded_up(clock):
+    limiter = server.RateLimiter("test", 2, 5)
+    asyncio.run(limiter.check("k"))
+    asyncio.run(limiter.check("k"))
+    clock.now += 0.5
+    with pytest.raises(server.HTTPException) as excinfo:
+        asyncio.run(limiter.check("k"))
+    assert excinfo.value.status_code == 429
+    # 0.2 tokens refilled at 0.4 tokens/s leaves 2s until the next whole token
+    assert excinfo.value.headers["Retry-After"] == "2"
+    assert (limiter.allowed, limiter.rejected) == (2, 1)
+
+
+def test_zero_limit_disables_the_limiter(clock):
+    limiter = server.RateLimiter("test", 0, 60)
+    for _ in range(10):
+        asyncio.run(limiter.check("k"))
+    assert limiter.rejected == 0
+
+
+def make_request(headers=(), client=("10.0.0.1", 1234)):
+    return server.HTTPRequest({
+        "type": "http", "method": "GET", "path": "/", "client": client,
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers]
+    })
+
+
+def test_client_ip_ignores_forwarded_headers_by_default(monkeypatch):
+    monkeypatch.setattr(server, "CLIENT_IP_HEADER", "")
+    assert server.client_ip(make_request([("X-Forwarded-For", "1.2.3.4")])) == "10.0.0.1"
+
+
+@pytest.mark.parametrize("hops, forwarded, expected", [
+    (1, "203.0.113.9", "203.0.113.9"),
+    (1, "6.6.6.6, 203.0.113.9", "203.0.113.9"),
+    (2, "6.6.6.6, 203.0.113.9, 10.1.1.1", "203.0.113.9"),
+    (2, "203.0.113.9", "10.0.0.1"),
+    (1, " , ", "10.0.0.1"),
+])
+def test_client_ip_takes_the_entry_the_trusted_proxies_appended(monkeypatch, hops, forwarded, expected):
+    monkeypatch.setattr(server, "CLIENT_IP_HEADER", "X-Forwarded-For")
+    monkeypatch.setattr(server, "CLIENT_IP_PROXY_HOPS", hops)
+    assert server.client_ip(make_request([("X-Forwarded-For", forwarded)])) == expected
+
+
+def test_client_ip_without_client_address(monkeypatch):
+    monkeypatch.setattr(server, "CLIENT_IP_HEADER", "")
+    assert server.client_ip(make_request(client=None)) == "unknown"
@@ -0,0 +1,16 @@
+"""Datetimes read back from MongoDB keep their UTC offset in responses."""
+from datetime import datetime, timezone
+
+import server
+
+
+def test_client_reads_aware_utc_datetimes():
+    options = server.client.codec_options
+    assert options.tz_aware
+    assert options.tzinfo == timezone.utc
+
+
+def test_user_serializes_stored_created_at_with_offset():
+    stored = datetime(2025, 1, 6, 9, 30, tzinfo=timezone.utc)
+    user = server.User(email="a@x.edu", name="A", role="student", created_at=stored)
+    assert user.model_dump(mode="json")["created_at"].endswith("Z")